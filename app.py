@@ -7,30 +7,96 @@ This file has been refactored. The application logic is now organized in:
 """
 
 import asyncio
+import logging
+import os
 import sys
 
-from dotenv import load_dotenv
+# Same logger as task.constants, without importing the application up front
+logger = logging.getLogger("browser-use-bridge")
 
-from app.bootstrap import run_server, setup_uvicorn_logging
-from task.constants import logger
+# uvloop is a faster drop-in event loop (not available on Windows)
+if sys.platform != "win32":
+    try:
+        import uvloop
+    except ImportError:
+        uvloop = None
+else:
+    uvloop = None
+
+
+def new_event_loop() -> asyncio.AbstractEventLoop:
+    """Create the server event loop, preferring uvloop when installed"""
+    if uvloop is not None:
+        loop = uvloop.new_event_loop()
+    else:
+        logger.info("uvloop not available, using the default asyncio event loop")
+        loop = asyncio.new_event_loop()
 
-# Load environment variables from .env file
-load_dotenv()
+    # The default thread pool (MAX_WORKER_THREADS) is installed by the app's
+    # lifespan, so uvicorn worker processes get it too
+    return loop
+
+
+def shutdown_event_loop(loop: asyncio.AbstractEventLoop) -> None:
+    """Cancel leftover tasks and close the loop (mirrors asyncio.run teardown)"""
+    try:
+        pending = asyncio.all_tasks(loop)
+        for task in pending:
+            task.cancel()
+        if pending:
+            loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        loop.run_until_complete(loop.shutdown_default_executor())
+    finally:
+        asyncio.set_event_loop(None)
+        loop.close()
 
 
 # Run server if executed directly
 if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    # Load environment variables from .env file before importing the
+    # application, since several modules read their configuration at import time
+    load_dotenv()
+
+    from app.bootstrap import run_server, run_workers, setup_uvicorn_logging
+
     setup_uvicorn_logging()
 
+    # Multi-process mode: uvicorn manages the workers and their signal handling
+    workers = int(os.environ.get("WORKERS", "1"))
+    if workers > 1:
+        run_workers(workers)
+        logger.info("Browser Use Bridge API stopped")
+        sys.exit(0)
+
+    loop = new_event_loop()
+    asyncio.set_event_loop(loop)
+
+    exit_code = 0
     try:
-        # Use asyncio.run with proper exception handling
-        asyncio.run(run_server())
+        loop.run_until_complete(run_server())
     except KeyboardInterrupt:
         # This should rarely be reached due to signal handling above
         pass  # Silent shutdown - the signal handler already logged the message
-    except Exception as e:
-        logger.error(f"Error starting server: {e}")
-        sys.exit(1)
+    except SystemExit as e:
+        # uvicorn logs startup failures such as a port already in use and
+        # calls sys.exit() itself; keep its exit code but still tear down below
+        exit_code = e.code if isinstance(e.code, int) else 1
+    except (OSError, ImportError) as e:
+        # Missing dependency, unreadable files, etc.: the message is enough
+        logger.error("Startup failed: %s", e)
+        exit_code = 1
+    except Exception:
+        logger.exception("Unexpected server error")
+        exit_code = 1
+
+    shutdown_event_loop(loop)
+    if exit_code == 0:
+        logger.info("Browser Use Bridge API stopped")
 
-    logger.info("Browser Use Bridge API stopped")
-    sys.exit(0)
+    # Everything has been torn down by now: flush the log handlers and exit
+    # without running interpreter finalization (atexit hooks, __del__ churn)
+    logging.shutdown()
+    os._exit(exit_code)
@@ -1,31 +1,77 @@
 """FastAPI application bootstrap and server configuration"""
 
 import asyncio
+import importlib
 import logging
 import os
 import signal
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator
 
 import uvicorn
 from fastapi import FastAPI
 
 from app.routes import router
-from app.middleware import add_json_serialization, setup_cors
+from app.middleware import setup_cors
+from app.responses import CachedStaticFiles, EnumJSONResponse
 from task.constants import logger
 from task.executor import cleanup_all_tasks
+from task.llm import close_http_client
 from task.storage import get_task_storage
 
 # Initialize task storage
 task_storage = get_task_storage()
 
+# Static assets (e.g. the live view page)
+STATIC_DIR = Path(__file__).parent / "static"
+
+# Seconds uvicorn waits for open connections on shutdown before cancelling them;
+# the lifespan cleanup that stops running agents only starts after that
+GRACEFUL_SHUTDOWN_TIMEOUT = int(os.environ.get("GRACEFUL_SHUTDOWN_TIMEOUT", "10"))
+
+
+class BridgeServer(uvicorn.Server):
+    """uvicorn server that ends live task streams as soon as shutdown starts"""
+
+    async def shutdown(self, sockets=None) -> None:
+        # Event streams only end with their task, so without this the server
+        # would wait on them until GRACEFUL_SHUTDOWN_TIMEOUT
+        task_storage.close_watchers()
+        await super().shutdown(sockets)
+
+
+async def warm_up_browser_use() -> None:
+    """Import browser_use on the thread pool
+
+    Tasks import it lazily to keep startup cheap, but the first import pulls in
+    Playwright and takes seconds; done on the event loop it would stall every request.
+    """
+    try:
+        await asyncio.to_thread(importlib.import_module, "browser_use")
+    except ImportError as e:
+        logger.warning(f"browser_use could not be imported, tasks will fail: {e}")
+
 
 @asynccontextmanager
-async def lifespan(_app: FastAPI):
+async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
     """Handle application startup and shutdown"""
     # Startup
     logger.info("Browser Use Bridge API starting up...")
 
+    # Blocking calls made from coroutines (Redis storage, filesystem setup for
+    # browser profiles, etc.) are offloaded with asyncio.to_thread onto this pool.
+    # The work done there is I/O-bound and releases the GIL while waiting, so
+    # other requests keep being served. Installed here rather than where the loop
+    # is created, so it also applies in each uvicorn worker process (WORKERS>1).
+    # Size it for the expected number of concurrent browser tasks.
+    max_workers = int(os.environ.get("MAX_WORKER_THREADS", "8"))
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bridge-worker")
+    )
+
     # Validate LLM Key Pool configuration
     from task.llm_pool import _llm_pool_manager
     logger.info("Validating LLM Key Pool configuration...")
@@ -36,27 +82,36 @@ async def lifespan(_app: FastAPI):
         else:
             logger.warning(f"⚠ {provider.upper()}: No API Keys configured")
 
+    # Runs in the background so the server starts accepting requests right away
+    browser_use_import = asyncio.create_task(warm_up_browser_use())
+
     yield
     # Shutdown
     logger.info("Browser Use Bridge API shutting down...")
+    browser_use_import.cancel()
     await cleanup_all_tasks(task_storage)
+    await close_http_client()
 
 
 def create_app() -> FastAPI:
     """Create and configure FastAPI application"""
-    app = FastAPI(title="Browser Use Bridge API", lifespan=lifespan)
+    app = FastAPI(
+        title="Browser Use Bridge API",
+        lifespan=lifespan,
+        default_response_class=EnumJSONResponse,
+    )
 
     # Add middleware
-    app.middleware("http")(add_json_serialization)
     setup_cors(app)
 
     # Include router
     app.include_router(router)
+    app.mount("/static", CachedStaticFiles(directory=STATIC_DIR), name="static")
 
     return app
 
 
-def setup_uvicorn_logging():
+def setup_uvicorn_logging() -> None:
     """Configure uvicorn to suppress some of the noisy shutdown logs"""
     # Reduce noise from uvicorn during shutdown
     uvicorn_logger = logging.getLogger("uvicorn.error")
@@ -67,7 +122,37 @@ def setup_uvicorn_logging():
     asyncio_logger.setLevel(logging.WARNING)
 
 
-async def run_server():
+def run_workers(workers: int) -> None:
+    """Run the server as multiple uvicorn worker processes sharing one socket
+
+    Each worker builds its own app through create_app(), so task state is only
+    shared between workers when the configured task storage is shared.
+    """
+    port = int(os.environ.get("PORT", 8000))
+
+    logger.info(f"Starting Browser Use Bridge API on port {port} with {workers} workers")
+    if os.environ.get("TASK_STORAGE", "memory") == "memory":
+        logger.warning(
+            "Task storage is per process: requests for a task must reach the worker that created it "
+            "(set TASK_STORAGE=redis to share tasks between workers)"
+        )
+
+    uvicorn.run(
+        "app.bootstrap:create_app",
+        factory=True,
+        host="0.0.0.0",
+        port=port,
+        workers=workers,
+        log_level="info",
+        access_log=False,  # Reduce noise
+        loop="auto",  # uvloop when installed
+        # Worker processes use the stock uvicorn server, so open event streams
+        # are cut off by this timeout rather than closed by BridgeServer
+        timeout_graceful_shutdown=GRACEFUL_SHUTDOWN_TIMEOUT,
+    )
+
+
+async def run_server() -> None:
     """Run the server with proper asyncio signal handling"""
     port = int(os.environ.get("PORT", 8000))
 
@@ -81,18 +166,21 @@ async def run_server():
         port=port,
         log_level="info",
         access_log=False,  # Reduce noise
-        loop="asyncio",
+        # serve() runs on the caller's loop (uvloop when installed, see app.py);
+        # "auto" picks the httptools parser when it is installed
+        http="auto",
+        timeout_graceful_shutdown=GRACEFUL_SHUTDOWN_TIMEOUT,
     )
-    server = uvicorn.Server(config)
+    server = BridgeServer(config)
 
     # Set up signal handlers for graceful shutdown
-    def signal_handler():
+    def signal_handler() -> None:
         logger.info("\nReceived shutdown signal, initiating graceful shutdown...")
         server.should_exit = True
 
     # Register signal handlers (Unix-like systems only)
     if sys.platform != "win32":
-        loop = asyncio.get_event_loop()
+        loop = asyncio.get_running_loop()
         for sig in (signal.SIGTERM, signal.SIGINT):
             loop.add_signal_handler(sig, signal_handler)  # type: ignore[arg-type]
 
@@ -1,11 +1,45 @@
 """FastAPI dependencies"""
 
+import re
 from typing import Optional
-from fastapi import Header
+from fastapi import Header, HTTPException, Query
 
 from task.storage.base import DEFAULT_USER_ID
 
+# Task IDs are generated by the server (UUIDs)
+_TASK_ID_RE = re.compile(r"\A[A-Za-z0-9_-]{1,64}\Z")
+# User IDs are chosen by callers (often e-mail addresses), so only reject what is
+# unsafe: ":" separates the parts of Redis keys, plus whitespace and control characters
+_USER_ID_RE = re.compile(r"\A[^\s:\x00-\x1f\x7f]{1,128}\Z")
+
+
+def _validate_user_id(user_id: Optional[str]) -> str:
+    if not user_id:
+        return DEFAULT_USER_ID
+    if not _USER_ID_RE.match(user_id):
+        raise HTTPException(status_code=400, detail="Invalid user ID")
+    return user_id
+
 
 async def get_user_id(x_user_id: Optional[str] = Header(None)) -> str:
     """Extract user ID from header or use default"""
-    return x_user_id or DEFAULT_USER_ID
+    return _validate_user_id(x_user_id)
+
+
+async def get_stream_user_id(
+    x_user_id: Optional[str] = Header(None),
+    user_id: Optional[str] = Query(None),
+) -> str:
+    """Extract user ID from header, falling back to the query string
+
+    Browser EventSource connections cannot set headers, so streaming endpoints
+    also accept ?user_id=.
+    """
+    return _validate_user_id(x_user_id or user_id)
+
+
+async def get_task_id(task_id: str) -> str:
+    """Validate the task ID path parameter, rejecting malformed IDs before any storage lookup"""
+    if not _TASK_ID_RE.match(task_id):
+        raise HTTPException(status_code=404, detail="Task not found")
+    return task_id
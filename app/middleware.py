@@ -1,47 +1,8 @@
 """FastAPI middleware configuration"""
 
-import json
-from enum import Enum
-
-from fastapi import FastAPI, Request, Response
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from task.constants import logger
-
-
-# Custom JSON encoder for Enum serialization
-class EnumJSONEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, Enum):
-            return obj.value
-        return super().default(obj)
-
-
-# Configure FastAPI to use custom JSON serialization for responses
-async def add_json_serialization(request: Request, call_next):
-    response = await call_next(request)
-
-    # Only attempt to modify JSON responses and check if body() method exists
-    if response.headers.get("content-type") == "application/json" and hasattr(
-        response, "body"
-    ):
-        try:
-            content = await response.body()
-            content_str = content.decode("utf-8")
-            content_dict = json.loads(content_str)
-            # Convert any Enum values to their string representation
-            content_str = json.dumps(content_dict, cls=EnumJSONEncoder)
-            response = Response(
-                content=content_str,
-                status_code=response.status_code,
-                headers=dict(response.headers),
-                media_type="application/json",
-            )
-        except Exception as e:
-            logger.error(f"Error serializing JSON response: {str(e)}")
-
-    return response
-
 
 def setup_cors(app: FastAPI):
     """Configure CORS middleware"""
@@ -0,0 +1,63 @@
+"""Custom response classes"""
+
+import json
+from enum import Enum
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from fastapi.staticfiles import StaticFiles
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Custom JSON encoder for Enum serialization
+class EnumJSONEncoder(json.JSONEncoder):
+    def default(self, obj):
+        if isinstance(obj, Enum):
+            return obj.value
+        return super().default(obj)
+
+
+def dumps_json(content: Any) -> bytes:
+    """Serialize content to compact JSON bytes, writing Enum members as their values"""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content,
+        cls=EnumJSONEncoder,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+class EnumJSONResponse(JSONResponse):
+    """JSON response that serializes Enum members (e.g. TaskStatus) to their values
+
+    Uses orjson when installed (it handles Enums natively and writes bytes
+    directly), falling back to the standard library encoder otherwise.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps_json(content)
+
+
+class CachedStaticFiles(StaticFiles):
+    """Static files served with a Cache-Control header
+
+    Starlette already sends ETag/Last-Modified, so once max_age expires browsers
+    revalidate and usually get a 304 back.
+    """
+
+    def __init__(self, *args: Any, max_age: int = 3600, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.cache_control = f"public, max-age={max_age}"
+
+    def file_response(self, *args: Any, **kwargs: Any):
+        response = super().file_response(*args, **kwargs)
+        response.headers["Cache-Control"] = self.cache_control
+        return response
@@ -1,19 +1,21 @@
 """API routes for browser automation tasks"""
 
-import asyncio
-import os
 import uuid
-from datetime import datetime, UTC
 from typing import Optional
+from urllib.parse import urlencode
 
 from fastapi import APIRouter, HTTPException, Depends, Query
-from fastapi.responses import HTMLResponse
+from fastapi.responses import RedirectResponse, Response, StreamingResponse
 
 from app.models import TaskRequest, TaskResponse, TaskStatusResponse
-from app.dependencies import get_user_id
-from task.constants import TaskStatus, logger
-from task.executor import execute_task
+from app.responses import dumps_json
+from app.dependencies import get_user_id, get_stream_user_id, get_task_id
+from task.browser_config import BROWSER_USE_HEADFUL, CHROME_PATH, CHROME_USER_DATA
+from task.constants import DEFAULT_WEBHOOK_EVENTS, TaskStatus, TERMINAL_STATUSES
+from task.executor import can_schedule_task, cancel_queued_task, schedule_task
 from task.storage import get_task_storage
+from task.storage.base import DEFAULT_USER_ID
+from task.utils import utc_now_iso
 
 # Initialize task storage
 task_storage = get_task_storage()
@@ -21,25 +23,34 @@ task_storage = get_task_storage()
 # Create API router
 router = APIRouter()
 
+# Agents are live objects in the process running the task. With shared storage and
+# several workers, a control request can reach a worker that does not have it.
+_NO_LOCAL_AGENT = "Task is not running in this worker process (it may still be starting, or run by another worker)"
 
-def _validate_task_and_get_agent(task_id: str, user_id: str, expected_status: TaskStatus):
-    """Helper function to validate task and get agent"""
-    task = task_storage.get_task(task_id, user_id)
+
+async def _validate_task_and_get_agent(task_id: str, user_id: str, expected_status: TaskStatus):
+    """Helper function to validate task and get agent
+
+    Returns (agent, None) on success, or (None, error_response) if the status does not match.
+    """
+    task, agent = await task_storage.call(task_storage.get_task_and_agent, task_id, user_id)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
 
     if task["status"] != expected_status:
-        return None, {"message": f"Task status is {task['status']}, expected {expected_status}"}
+        return None, {"message": f"Task status is {TaskStatus(task['status']).value}, expected {expected_status.value}"}
 
-    agent = task_storage.get_task_agent(task_id, user_id)
-    return agent, task
+    return agent, None
 
 
 @router.post("/api/v1/run-task", response_model=TaskResponse)
 async def run_task(request: TaskRequest, user_id: str = Depends(get_user_id)):
     """Start a browser automation task"""
+    if not can_schedule_task():
+        raise HTTPException(status_code=429, detail="Too many tasks in progress, try again later")
+
     task_id = str(uuid.uuid4())
-    now = datetime.now(UTC).isoformat() + "Z"
+    now = utc_now_iso()
 
     # Generate live URL
     live_url = f"/live/{task_id}"
@@ -69,45 +80,26 @@ async def run_task(request: TaskRequest, user_id: str = Depends(get_user_id)):
         "live_url": live_url,
         # Webhook configuration
         "webhook_url": request.webhook_url,
-        "webhook_events": request.webhook_events or ["task.completed", "task.failed"],
+        "webhook_events": request.webhook_events or DEFAULT_WEBHOOK_EVENTS,
     }
 
     # Store the task in storage
-    task_storage.create_task(task_id, task_data, user_id)
+    await task_storage.call(task_storage.create_task, task_id, task_data, user_id)
 
-    # Start task in background
+    # Start task in background (waits for a free slot if too many are running)
     ai_provider = request.ai_provider or "openai"
-    asyncio.create_task(execute_task(task_id, request.task, ai_provider, user_id, task_storage))
+    schedule_task(task_id, request.task, ai_provider, user_id, task_storage)
 
     return TaskResponse(id=task_id, status=TaskStatus.CREATED, live_url=live_url)
 
 
 @router.get("/api/v1/task/{task_id}/status", response_model=TaskStatusResponse)
-async def get_task_status(task_id: str, user_id: str = Depends(get_user_id)):
+async def get_task_status(task_id: str = Depends(get_task_id), user_id: str = Depends(get_user_id)):
     """Get status of a task"""
-    task = task_storage.get_task(task_id, user_id)
-
-    agent = task_storage.get_task_agent(task_id, user_id)
-
+    task = await task_storage.call(task_storage.get_task, task_id, user_id)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
 
-    # Only increment steps for running tasks
-    if task["status"] == TaskStatus.RUNNING:
-        # Initialize steps array if not present
-        current_step = len(task.get("steps", [])) + 1
-
-        # Add step info
-        step_info = {
-            "step": current_step,
-            "timestamp": datetime.now(UTC).isoformat() + "Z",
-            "next_goal": f"Progress check {current_step}",
-            "evaluation_previous_goal": "In progress",
-        }
-
-        task_storage.add_task_step(task_id, step_info, user_id)
-        logger.info(f"Added step {current_step} for task {task_id}")
-
     return TaskStatusResponse(
         status=task["status"],
         result=task.get("output"),
@@ -116,74 +108,137 @@ async def get_task_status(task_id: str, user_id: str = Depends(get_user_id)):
 
 
 @router.get("/api/v1/task/{task_id}", response_model=dict)
-async def get_task(task_id: str, user_id: str = Depends(get_user_id)):
-    """Get full task details"""
-    task = task_storage.get_task(task_id, user_id)
+async def get_task(
+    task_id: str = Depends(get_task_id),
+    user_id: str = Depends(get_user_id),
+    fields: Optional[str] = Query(None, description="Comma-separated top-level fields to return"),
+    steps_limit: Optional[int] = Query(None, ge=1, le=1000, description="Only return the last N steps"),
+):
+    """Get full task details, optionally trimmed to some fields and the latest steps"""
+    task = await task_storage.call(task_storage.get_task, task_id, user_id)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
 
+    if fields:
+        wanted = {field.strip() for field in fields.split(",")}
+        task = {k: v for k, v in task.items() if k in wanted}
+    if steps_limit is not None and task.get("steps"):
+        task["steps"] = task["steps"][-steps_limit:]
+
     return task
 
 
+@router.get("/api/v1/task/{task_id}/steps")
+async def get_task_steps(
+    task_id: str = Depends(get_task_id),
+    user_id: str = Depends(get_user_id),
+    since: int = Query(0, ge=0, description="Number of steps the caller already has"),
+):
+    """Get the steps recorded after the first since steps
+
+    Pass the previous response's "next" as since to fetch only new steps.
+    """
+    result = await task_storage.call(task_storage.get_task_steps, task_id, user_id, since)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+
+    # A since past the end returns no steps, and next points at the end
+    steps, total = result
+    return {"steps": steps, "next": min(since, total) + len(steps)}
+
+
+@router.get("/api/v1/task/{task_id}/events")
+async def task_events(task_id: str = Depends(get_task_id), user_id: str = Depends(get_stream_user_id)):
+    """Stream task updates as Server-Sent Events
+
+    Sends the task once on connect and again whenever it changes, and ends the
+    stream once the task reaches a terminal status. Each message carries only the
+    steps not sent before, starting at index steps_offset (0 on a new connection).
+    """
+    if not await task_storage.call(task_storage.task_exists, task_id, user_id):
+        raise HTTPException(status_code=404, detail="Task not found")
+
+    async def event_stream():
+        steps_sent = 0
+        async for task in task_storage.watch_task(task_id, user_id):
+            if task is None:
+                # Comment line keeps proxies from closing an idle connection
+                yield b": keep-alive\n\n"
+                continue
+
+            steps = task.get("steps") or []
+            task["steps"] = steps[steps_sent:]
+            task["steps_offset"] = steps_sent
+            steps_sent = len(steps)
+            yield b"data: " + dumps_json(task) + b"\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.put("/api/v1/stop-task/{task_id}")
-async def stop_task(task_id: str, user_id: str = Depends(get_user_id)):
+async def stop_task(task_id: str = Depends(get_task_id), user_id: str = Depends(get_user_id)):
     """Stop a running task"""
-    task = task_storage.get_task(task_id, user_id)
+    task, agent = await task_storage.call(task_storage.get_task_and_agent, task_id, user_id)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
 
-    if task["status"] in [
-        TaskStatus.FINISHED,
-        TaskStatus.FAILED,
-        TaskStatus.STOPPED,
-    ]:
-        return {"message": f"Task already in terminal state: {task['status']}"}
+    if task["status"] in TERMINAL_STATUSES:
+        return {"message": f"Task already in terminal state: {TaskStatus(task['status']).value}"}
 
-    # Get agent
-    agent = task_storage.get_task_agent(task_id, user_id)
     if agent:
         # Call agent's stop method
         agent.stop()
-        task_storage.update_task_status(task_id, TaskStatus.STOPPING, user_id)
+        await task_storage.call(task_storage.update_task_status, task_id, TaskStatus.STOPPING, user_id)
         return {"message": "Task stopping"}
-    else:
-        task_storage.update_task_status(task_id, TaskStatus.STOPPED, user_id)
-        task_storage.mark_task_finished(task_id, user_id, TaskStatus.STOPPED)
+    elif task["status"] == TaskStatus.CREATED and await task_storage.call(
+        task_storage.update_task_if_status, task_id, TaskStatus.CREATED,
+        {"status": TaskStatus.STOPPED, "finished_at": utc_now_iso()}, user_id,
+    ):
+        # Still queued: drop it from the queue so it stops counting as pending
+        cancel_queued_task(task_id, user_id)
         return {"message": "Task stopped (no agent found)"}
+    else:
+        # Running in another worker, or it started between the read and the write above;
+        # writing STOPPED here would be overwritten when the owning worker finishes
+        raise HTTPException(status_code=409, detail=_NO_LOCAL_AGENT)
 
 
 @router.put("/api/v1/pause-task/{task_id}")
-async def pause_task(task_id: str, user_id: str = Depends(get_user_id)):
+async def pause_task(task_id: str = Depends(get_task_id), user_id: str = Depends(get_user_id)):
     """Pause a running task"""
-    agent, result = _validate_task_and_get_agent(task_id, user_id, TaskStatus.RUNNING)
+    agent, result = await _validate_task_and_get_agent(task_id, user_id, TaskStatus.RUNNING)
 
-    # If result is a dict, it means status check failed
-    if isinstance(result, dict):
+    # A response means the status check failed
+    if result is not None:
         return result
 
     if agent:
         agent.pause()
-        task_storage.update_task_status(task_id, TaskStatus.PAUSED, user_id)
+        await task_storage.call(task_storage.update_task_status, task_id, TaskStatus.PAUSED, user_id)
         return {"message": "Task paused"}
     else:
-        return {"message": "Task could not be paused (no agent found)"}
+        raise HTTPException(status_code=409, detail=_NO_LOCAL_AGENT)
 
 
 @router.put("/api/v1/resume-task/{task_id}")
-async def resume_task(task_id: str, user_id: str = Depends(get_user_id)):
+async def resume_task(task_id: str = Depends(get_task_id), user_id: str = Depends(get_user_id)):
     """Resume a paused task"""
-    agent, result = _validate_task_and_get_agent(task_id, user_id, TaskStatus.PAUSED)
+    agent, result = await _validate_task_and_get_agent(task_id, user_id, TaskStatus.PAUSED)
 
-    # If result is a dict, it means status check failed
-    if isinstance(result, dict):
+    # A response means the status check failed
+    if result is not None:
         return result
 
     if agent:
         agent.resume()
-        task_storage.update_task_status(task_id, TaskStatus.RUNNING, user_id)
+        await task_storage.call(task_storage.update_task_status, task_id, TaskStatus.RUNNING, user_id)
         return {"message": "Task resumed"}
     else:
-        return {"message": "Task could not be resumed (no agent found)"}
+        raise HTTPException(status_code=409, detail=_NO_LOCAL_AGENT)
 
 
 @router.get("/api/v1/list-tasks")
@@ -191,172 +246,54 @@ async def list_tasks(
     user_id: str = Depends(get_user_id),
     page: int = Query(1, ge=1),
     per_page: int = Query(100, ge=1, le=1000),
+    after: Optional[str] = Query(None, description="Cursor: the \"next\" value from the previous page"),
 ):
-    """List all tasks"""
-    return task_storage.list_tasks(user_id, page, per_page)
+    """List all tasks
 
+    Pass the previous response's "next" as after to page by cursor; unlike page
+    offsets, this stays stable while new tasks are being created.
+    """
+    try:
+        return await task_storage.call(task_storage.list_tasks, user_id, page, per_page, after=after)
+    except KeyError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
-@router.get("/live/{task_id}", response_class=HTMLResponse)
-async def live_view(task_id: str, user_id: str = Depends(get_user_id)):
-    """Get a live view of a task that can be embedded in an iframe"""
-    task = task_storage.get_task(task_id, user_id)
-    if not task:
-        raise HTTPException(status_code=404, detail="Task not found")
 
-    html_content = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>Browser Use Task {task_id}</title>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <style>
-            body {{ font-family: Arial, sans-serif; margin: 0; padding: 20px; }}
-            .container {{ max-width: 1200px; margin: 0 auto; }}
-            .status {{ padding: 10px; border-radius: 4px; margin-bottom: 20px; }}
-            .{TaskStatus.RUNNING} {{ background-color: #e3f2fd; }}
-            .{TaskStatus.FINISHED} {{ background-color: #e8f5e9; }}
-            .{TaskStatus.FAILED} {{ background-color: #ffebee; }}
-            .{TaskStatus.PAUSED} {{ background-color: #fff8e1; }}
-            .{TaskStatus.STOPPED} {{ background-color: #eeeeee; }}
-            .{TaskStatus.CREATED} {{ background-color: #f3e5f5; }}
-            .{TaskStatus.STOPPING} {{ background-color: #fce4ec; }}
-            .controls {{ margin-bottom: 20px; }}
-            button {{ padding: 8px 16px; margin-right: 10px; cursor: pointer; }}
-            pre {{ background-color: #f5f5f5; padding: 15px; border-radius: 4px; overflow: auto; }}
-            .step {{ margin-bottom: 10px; padding: 10px; border: 1px solid #ddd; border-radius: 4px; }}
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <h1>Browser Use Task</h1>
-            <div id="status" class="status">Loading...</div>
-
-            <div class="controls">
-                <button id="pauseBtn">Pause</button>
-                <button id="resumeBtn">Resume</button>
-                <button id="stopBtn">Stop</button>
-            </div>
-
-            <h2>Result</h2>
-            <pre id="result">Loading...</pre>
-
-            <h2>Steps</h2>
-            <div id="steps">Loading...</div>
-
-            <script>
-                const taskId = '{task_id}';
-                const FINISHED = '{TaskStatus.FINISHED}';
-                const FAILED = '{TaskStatus.FAILED}';
-                const STOPPED = '{TaskStatus.STOPPED}';
-                const userId = '{user_id}';
-
-                // Set user ID in request headers if available
-                const headers = {{}};
-                if (userId && userId !== 'default') {{
-                    headers['X-User-ID'] = userId;
-                }}
-
-                // Update status function
-                function updateStatus() {{
-                    fetch(`/api/v1/task/${{taskId}}/status`, {{ headers }})
-                        .then(response => response.json())
-                        .then(data => {{
-                            // Update status element
-                            const statusEl = document.getElementById('status');
-                            statusEl.textContent = `Status: ${{data.status}}`;
-                            statusEl.className = `status ${{data.status}}`;
-
-                            // Update result if available
-                            if (data.result) {{
-                                document.getElementById('result').textContent = data.result;
-                            }} else if (data.error) {{
-                                document.getElementById('result').textContent = `Error: ${{data.error}}`;
-                            }}
-
-                            // Continue polling if not in terminal state
-                            if (![FINISHED, FAILED, STOPPED].includes(data.status)) {{
-                                setTimeout(updateStatus, 2000);
-                            }}
-                        }})
-                        .catch(error => {{
-                            console.error('Error fetching status:', error);
-                            setTimeout(updateStatus, 5000);
-                        }});
-
-                    // Also fetch full task to get steps
-                    fetch(`/api/v1/task/${{taskId}}`, {{ headers }})
-                        .then(response => response.json())
-                        .then(data => {{
-                            if (data.steps && data.steps.length > 0) {{
-                                const stepsHtml = data.steps.map(step => `
-                                    <div class="step">
-                                        <strong>Step ${{step.step}}</strong>
-                                        <p>Next Goal: ${{step.next_goal || 'N/A'}}</p>
-                                        <p>Evaluation: ${{step.evaluation_previous_goal || 'N/A'}}</p>
-                                    </div>
-                                `).join('');
-                                document.getElementById('steps').innerHTML = stepsHtml;
-                            }} else {{
-                                document.getElementById('steps').textContent = 'No steps recorded yet.';
-                            }}
-                        }})
-                        .catch(error => {{
-                            console.error('Error fetching task details:', error);
-                        }});
-                }}
-
-                // Setup control buttons
-                document.getElementById('pauseBtn').addEventListener('click', () => {{
-                    fetch(`/api/v1/pause-task/${{taskId}}`, {{
-                        method: 'PUT',
-                        headers
-                    }})
-                        .then(response => response.json())
-                        .then(data => alert(data.message))
-                        .catch(error => console.error('Error pausing task:', error));
-                }});
-
-                document.getElementById('resumeBtn').addEventListener('click', () => {{
-                    fetch(`/api/v1/resume-task/${{taskId}}`, {{
-                        method: 'PUT',
-                        headers
-                    }})
-                        .then(response => response.json())
-                        .then(data => alert(data.message))
-                        .catch(error => console.error('Error resuming task:', error));
-                }});
-
-                document.getElementById('stopBtn').addEventListener('click', () => {{
-                    if (confirm('Are you sure you want to stop this task? This action cannot be undone.')) {{
-                        fetch(`/api/v1/stop-task/${{taskId}}`, {{
-                            method: 'PUT',
-                            headers
-                        }})
-                            .then(response => response.json())
-                            .then(data => alert(data.message))
-                            .catch(error => console.error('Error stopping task:', error));
-                    }}
-                }});
-
-                // Start status updates
-                updateStatus();
-
-                // Refresh every 5 seconds
-                setInterval(updateStatus, 5000);
-            </script>
-        </div>
-    </body>
-    </html>
+@router.get("/live/{task_id}")
+async def live_view(task_id: str = Depends(get_task_id), user_id: str = Depends(get_user_id)):
+    """Get a live view of a task that can be embedded in an iframe
+
+    Redirects to the static live view page, which reads the task and user IDs from
+    its query string, so browsers cache one page for every task.
     """
+    if not await task_storage.call(task_storage.task_exists, task_id, user_id):
+        raise HTTPException(status_code=404, detail="Task not found")
+
+    query = {"task": task_id}
+    if user_id != DEFAULT_USER_ID:
+        query["user"] = user_id
+    return RedirectResponse(f"/static/live.html?{urlencode(query)}", status_code=302)
 
-    return HTMLResponse(content=html_content)
 
+# Health check body, encoded once: load balancers may hit this very often
+_PING_BODY = b'{"status":"success","message":"API is running"}'
 
-@router.get("/api/v1/ping")
+
+@router.api_route("/api/v1/ping", methods=["GET", "HEAD"])
 async def ping():
     """Health check endpoint"""
-    return {"status": "success", "message": "API is running"}
+    return Response(content=_PING_BODY, media_type="application/json")
+
+
+# Browser settings only come from the environment, so the response never changes
+_BROWSER_CONFIG_RESPONSE = {
+    "headful": BROWSER_USE_HEADFUL,
+    "headless": not BROWSER_USE_HEADFUL,
+    "chrome_path": CHROME_PATH,
+    "chrome_user_data": CHROME_USER_DATA,
+    "using_custom_chrome": CHROME_PATH is not None,
+    "using_user_data": CHROME_USER_DATA is not None,
+}
 
 
 @router.get("/api/v1/browser-config")
@@ -366,15 +303,4 @@ async def browser_config():
     Note: Chrome paths (CHROME_PATH and CHROME_USER_DATA) can only be set via
     environment variables for security reasons and cannot be overridden in task requests.
     """
-    headful = os.environ.get("BROWSER_USE_HEADFUL", "false").lower() == "true"
-    chrome_path = os.environ.get("CHROME_PATH", None)
-    chrome_user_data = os.environ.get("CHROME_USER_DATA", None)
-
-    return {
-        "headful": headful,
-        "headless": not headful,
-        "chrome_path": chrome_path,
-        "chrome_user_data": chrome_user_data,
-        "using_custom_chrome": chrome_path is not None,
-        "using_user_data": chrome_user_data is not None,
-    }
+    return _BROWSER_CONFIG_RESPONSE
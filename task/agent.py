@@ -1,18 +1,20 @@
 """Agent creation and configuration"""
 
-from typing import Literal, Optional
+from typing import TYPE_CHECKING, Callable, Literal, Optional
 
-from browser_use import BrowserSession
+if TYPE_CHECKING:
+    from browser_use import BrowserSession
 
 
 def create_agent_config(
     instruction: str,
     llm,
     sensitive_data: dict,
-    browserSession: Optional[BrowserSession] = None,
+    browserSession: Optional["BrowserSession"] = None,
     use_vision: Optional[bool | Literal['auto']] = None,
     output_model: Optional[type] = None,
     max_history_items: int = 10,
+    step_callback: Optional[Callable] = None,
 ):
     """Create agent configuration dictionary
 
@@ -24,6 +26,8 @@ def create_agent_config(
         use_vision: Whether to use vision capabilities ('auto', True, or False)
         output_model: Optional Pydantic model class for structured output
         max_history_items: Maximum number of history messages to keep (default: 10)
+        step_callback: Optional callback invoked by the agent after each step
+            with (browser_state_summary, model_output, step_number)
 
     Returns:
         Dictionary of agent configuration parameters
@@ -44,4 +48,7 @@ def create_agent_config(
     if output_model is not None:
         agent_kwargs["output_model_schema"] = output_model
 
+    if step_callback is not None:
+        agent_kwargs["register_new_step_callback"] = step_callback
+
     return agent_kwargs
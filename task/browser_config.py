@@ -1,26 +1,59 @@
 """Browser configuration for task execution"""
 
+import asyncio
 import os
+import secrets
 import time
-import uuid
 from pathlib import Path
-from typing import Optional
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Optional
 
-from browser_use import BrowserProfile, BrowserSession
+from task.constants import logger, MAX_HISTORY_ITEMS
 
-from task.constants import logger
+if TYPE_CHECKING:
+    from browser_use import BrowserSession
 
+BROWSER_DATA_DIR = Path("data/browser")
 
-def configure_browser_profile(
+# Environment defaults, resolved once at import
+BROWSER_USE_HEADFUL = os.environ.get("BROWSER_USE_HEADFUL", "false").lower() == "true"
+CHROME_PATH = os.environ.get("CHROME_PATH")
+CHROME_USER_DATA = os.environ.get("CHROME_USER_DATA")
+
+# Browser profile settings shared by every task; per-task values are layered on top
+_BASE_BROWSER_CONFIG_ARGS = MappingProxyType({
+    "viewport": {"width": 1280, "height": 720},
+    "window_size": {"width": 1280, "height": 720},
+    "ignore_default_args": ["--enable-automation"],
+    "dom_highlight_elements": False,
+    "disable_security": False,
+    "wait_for_network_idle_page_load_time": 2.0,
+    "wait_between_actions": 1.0,
+})
+
+# Set once the browser data directory has been created
+_browser_data_dir_ready = False
+
+
+async def _ensure_browser_data_dir() -> Path:
+    """Create the browser data directory on first use, skipping the syscalls afterwards"""
+    global _browser_data_dir_ready
+    if not _browser_data_dir_ready:
+        # Filesystem calls block, keep them off the event loop
+        await asyncio.to_thread(BROWSER_DATA_DIR.mkdir, parents=True, exist_ok=True)
+        _browser_data_dir_ready = True
+    return BROWSER_DATA_DIR
+
+
+async def configure_browser_profile(
     task_browser_config: dict,
-) -> tuple[Optional[BrowserSession], dict]:
+) -> tuple[Optional["BrowserSession"], dict]:
     """Configure browser based on task and environment settings"""
+    from browser_use import BrowserProfile, BrowserSession
+
     # Configure browser headless/headful mode (task setting overrides env var)
     task_headful = task_browser_config.get("headful")
-    if task_headful is not None:
-        headful = task_headful
-    else:
-        headful = os.environ.get("BROWSER_USE_HEADFUL", "false").lower() == "true"
+    headful = task_headful if task_headful is not None else BROWSER_USE_HEADFUL
 
     # Get Chrome path and user data directory (task settings override env vars)
     use_custom_chrome = task_browser_config.get("use_custom_chrome")
@@ -29,35 +62,29 @@ def configure_browser_profile(
         chrome_path = None
         chrome_user_data = None
     else:
-        chrome_path = os.environ.get("CHROME_PATH")
-        chrome_user_data = os.environ.get("CHROME_USER_DATA")
+        chrome_path = CHROME_PATH
+        chrome_user_data = CHROME_USER_DATA
 
-    browser = None
     browser_info = {
         "headful": headful,
         "chrome_path": chrome_path,
         "chrome_user_data": chrome_user_data,
     }
 
-
     browser_args = [
-            "--disable-blink-features=AutomationControlled",
-            "--disable-dev-shm-usage",
-            "--disable-infobars",
+        "--disable-blink-features=AutomationControlled",
+        "--disable-dev-shm-usage",
+        "--disable-infobars",
     ]
 
     if headful:
-            browser_args.append("--start-maximized")
-            logger.info("Headful mode: maximize browser window")
+        browser_args.append("--start-maximized")
+        logger.info("Headful mode: maximize browser window")
     else:
-            browser_args.extend(["--no-sandbox", "--disable-gpu", "--window-size=1920,1080"])
-            logger.info("Headless mode: set window size to 1920x1080")
+        browser_args.extend(["--no-sandbox", "--disable-gpu", "--window-size=1920,1080"])
+        logger.info("Headless mode: set window size to 1920x1080")
 
-    wait_page_load = 2.0
-    wait_actions = 1.0
-
-    browser_data_dir = Path("data/browser")
-    browser_data_dir.mkdir(parents=True, exist_ok=True)
+    browser_data_dir = await _ensure_browser_data_dir()
 
     storage_state_path = browser_data_dir / "storage_state.json"
 
@@ -65,43 +92,36 @@ def configure_browser_profile(
         user_data_path = Path(chrome_user_data)
     else:
         timestamp = time.strftime("%Y%m%d_%H%M%S")
-        unique_id = str(uuid.uuid4())[:8]
+        unique_id = secrets.token_hex(4)
         user_data_path = browser_data_dir / f"tmp_user_data_{timestamp}_{unique_id}"
 
     logger.info(f"Browser storage: state={storage_state_path}, data={user_data_path}")
 
+    use_chrome_path = bool(chrome_path) and chrome_path.lower() != "false"
+    if use_chrome_path:
+        logger.info(f"Using custom Chrome executable: {chrome_path}")
+
     browser_config_args = {
-            "headless": not headful,
-            "chrome_instance_path": None,
-            "viewport": {"width": 1280, "height": 720},
-            "window_size": {"width": 1280, "height": 720},
-            "args": browser_args,
-            "ignore_default_args": ["--enable-automation"],
-            "dom_highlight_elements": False,
-            "disable_security": False,
-            "wait_for_network_idle_page_load_time": wait_page_load,
-            "wait_between_actions": wait_actions,
-            "storage_state": str(storage_state_path),
-            "user_data_dir": str(user_data_path),
-        }
-
-    if chrome_path and chrome_path.lower() != "false":
-            browser_config_args["chrome_instance_path"] = chrome_path
-            logger.info(f"Using custom Chrome executable: {chrome_path}")
+        **_BASE_BROWSER_CONFIG_ARGS,
+        "headless": not headful,
+        "chrome_instance_path": chrome_path if use_chrome_path else None,
+        "args": browser_args,
+        "storage_state": str(storage_state_path),
+        "user_data_dir": str(user_data_path),
+    }
 
     window_config = task_browser_config.get("window_config")
     if window_config:
-            browser_config_args.update(window_config)
-            logger.info(f"Using custom window config: {window_config}")
+        browser_config_args.update(window_config)
+        logger.info(f"Using custom window config: {window_config}")
 
     browser_config = BrowserProfile(**browser_config_args)
     browser = BrowserSession(browser_profile=browser_config)
     browser_info["browser_config_args"] = browser_config_args
 
-    # Configure BrowserSession EventBus max_history_size to reduce memory usage
-    # Import MAX_HISTORY_ITEMS to maintain consistency with Agent configuration
+    # Configure BrowserSession EventBus max_history_size to reduce memory usage,
+    # using MAX_HISTORY_ITEMS to stay consistent with the Agent configuration
     # Note: BrowserSession uses 'event_bus' (with underscore), not 'eventbus'
-    from task.constants import MAX_HISTORY_ITEMS
     if hasattr(browser, 'event_bus') and browser.event_bus:
         try:
             old_size = browser.event_bus.max_history_size
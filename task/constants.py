@@ -8,6 +8,14 @@ from enum import Enum
 # Agent configuration constants
 MAX_HISTORY_ITEMS = int(os.environ.get("MAX_HISTORY_ITEMS", "10"))
 
+# Task execution limits: tasks beyond MAX_CONCURRENT_TASKS wait for a free slot,
+# new tasks are rejected once MAX_PENDING_TASKS are running or waiting
+MAX_CONCURRENT_TASKS = int(os.environ.get("MAX_CONCURRENT_TASKS", "4"))
+MAX_PENDING_TASKS = int(os.environ.get("MAX_PENDING_TASKS", "100"))
+
+# Webhook events a task subscribes to when the request does not list any
+DEFAULT_WEBHOOK_EVENTS = ("task.completed", "task.failed")
+
 # LLM Pool configuration
 SUPPORTED_POOLED_PROVIDERS = ["openai", "anthropic", "google"]
 
@@ -23,6 +31,10 @@ class TaskStatus(str, Enum):
     STOPPING = "stopping"  # Task is in the process of stopping (transitional state)
 
 
+# Statuses a task never leaves once reached
+TERMINAL_STATUSES = frozenset({TaskStatus.FINISHED, TaskStatus.FAILED, TaskStatus.STOPPED})
+
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
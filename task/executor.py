@@ -1,31 +1,95 @@
 """Task execution orchestration"""
 
-from typing import Optional
-
-from browser_use import Agent, BrowserSession
-from browser_use.agent.views import AgentHistoryList
-
-from task.constants import TaskStatus, logger, MAX_HISTORY_ITEMS
-from task.llm import get_llm
+import asyncio
+from typing import TYPE_CHECKING, Optional
+
+from task.constants import (
+    TaskStatus,
+    logger,
+    MAX_HISTORY_ITEMS,
+    MAX_CONCURRENT_TASKS,
+    MAX_PENDING_TASKS,
+)
+from task.llm import get_llm, get_model_id
 from task.browser_config import configure_browser_profile
 from task.agent import create_agent_config
-from task.utils import get_sensitive_data, prepare_task_environment, trigger_webhook
+from task.utils import get_sensitive_data, prepare_task_environment, trigger_webhook, utc_now_iso
 from task.storage.base import DEFAULT_USER_ID
 from task.schema_utils import parse_output_model_schema
+from task.result_cache import (
+    RESULT_CACHE_ENABLED,
+    RESULT_CACHE_TTL,
+    make_result_cache_key,
+    result_cache,
+)
+
+# browser_use pulls in Playwright and friends; it is imported where a task runs,
+# so starting the API (and every uvicorn worker) stays cheap
+if TYPE_CHECKING:
+    from browser_use import BrowserSession
+
+# Strong references to scheduled tasks, the event loop only keeps weak ones
+_background_tasks: set[asyncio.Task] = set()
+# Scheduled tasks still waiting for an execution slot, keyed by (user_id, task_id)
+_queued_tasks: dict[tuple, asyncio.Task] = {}
+_task_semaphore = asyncio.Semaphore(MAX_CONCURRENT_TASKS)
+
 
+def get_task_output(result) -> str:
+    """Extract the output to store from a task execution result"""
+    from browser_use.agent.views import AgentHistoryList
 
-async def process_task_result(result, task_id: str, user_id: str, task_storage):
-    """Process and store task execution result"""
     if isinstance(result, AgentHistoryList):
-        final_result = result.final_result()
-        task_storage.set_task_output(task_id, final_result or "", user_id)
-    else:
-        task_storage.set_task_output(task_id, str(result), user_id)
+        return result.final_result() or ""
+    return str(result)
+
+
+async def notify_task_completed(task: Optional[dict], task_id: str, output: Optional[str]):
+    """Trigger the task.completed webhook if the task subscribed to it"""
+    webhook_url = task.get("webhook_url") if task else None
+    webhook_events = task.get("webhook_events", []) if task else []
+    if webhook_url and "task.completed" in webhook_events:
+        await trigger_webhook(
+            webhook_url=webhook_url,
+            task_id=task_id,
+            status="completed",
+            event_type="task.completed",
+            result=output
+        )
+
+
+def make_step_recorder(task_id: str, user_id: str, task_storage):
+    """Create an agent step callback that records each real step in storage
+
+    The callback is a coroutine (browser_use awaits those), so blocking storage
+    backends can be written to without stalling the event loop.
+    """
+
+    async def record_step(_browser_state_summary, model_output, step_number: int):
+        try:
+            # Newer browser_use versions flatten the agent brain into the output
+            brain = getattr(model_output, "current_state", model_output)
+            step_info = {
+                "step": step_number,
+                "timestamp": utc_now_iso(),
+                "next_goal": getattr(brain, "next_goal", None),
+                "evaluation_previous_goal": getattr(brain, "evaluation_previous_goal", None),
+            }
+            await task_storage.call(task_storage.add_task_step, task_id, step_info, user_id)
+        except Exception as e:
+            logger.warning(f"Task {task_id}: Failed to record step {step_number}: {e}")
+
+    return record_step
 
 
-async def collect_browser_cookies(agent, task_id: str, user_id: str, task_storage):
-    """Collect browser cookies if requested and available"""
-    task = task_storage.get_task(task_id, user_id)
+async def collect_browser_cookies(agent, task_id: str, user_id: str, task_storage,
+                                  task: Optional[dict] = None):
+    """Collect browser cookies if requested and available
+
+    Pass the task already read by the caller to skip another storage lookup.
+    """
+    if task is None:
+        task = await task_storage.call(task_storage.get_task, task_id, user_id)
     if (
         not task
         or not task.get("save_browser_data")
@@ -58,21 +122,21 @@ async def collect_browser_cookies(agent, task_id: str, user_id: str, task_storag
         else:
             logger.warning(f"No method to collect cookies for task {task_id}")
 
-        task_storage.update_task(
-            task_id, {"browser_data": {"cookies": cookies}}, user_id
+        await task_storage.call(
+            task_storage.update_task, task_id, {"browser_data": {"cookies": cookies}}, user_id
         )
     except Exception as e:
         logger.error(f"Failed to collect browser data: {str(e)}")
-        task_storage.update_task(
-            task_id, {"browser_data": {"cookies": [], "error": str(e)}}, user_id
+        await task_storage.call(
+            task_storage.update_task, task_id, {"browser_data": {"cookies": [], "error": str(e)}}, user_id
         )
 
 
-async def cleanup_task(browser: Optional[BrowserSession], task_id: str, user_id: str, task_storage):
+async def cleanup_task(browser: Optional["BrowserSession"], task_id: str, user_id: str, task_storage):
     """Clean up task resources after execution"""
     # 1. Stop agent (sets stop flag)
     try:
-        agent = task_storage.get_task_agent(task_id, user_id)
+        agent = await task_storage.call(task_storage.get_task_agent, task_id, user_id)
         if agent:
             logger.info(f"Stopping agent for task {task_id}")
             try:
@@ -92,7 +156,7 @@ async def cleanup_task(browser: Optional[BrowserSession], task_id: str, user_id:
 
     # 3. Remove agent reference from storage (enables garbage collection)
     try:
-        task_storage.remove_task_agent(task_id, user_id)
+        await task_storage.call(task_storage.remove_task_agent, task_id, user_id)
     except Exception as e:
         logger.warning(f"Error removing agent reference for task {task_id}: {e}")
 
@@ -102,22 +166,51 @@ async def execute_task(
 ):
     """Execute browser task in background - main orchestration function
 
+    The caller has already moved the task to RUNNING.
+
     Chrome paths (CHROME_PATH and CHROME_USER_DATA) are only sourced from
     environment variables for security reasons.
     """
-    browser: Optional[BrowserSession] = None
+    browser: Optional["BrowserSession"] = None
+    task: Optional[dict] = None
     try:
-        # Update task status and prepare environment
-        task_storage.update_task_status(task_id, TaskStatus.RUNNING, user_id)
+        # Inside the try, so a missing or broken browser_use fails the task
+        # (status, webhook, cleanup) instead of leaving it stuck
+        from browser_use import Agent
+        from browser_use.agent.views import AgentHistoryList
+
+        # Prepare environment
         prepare_task_environment(task_id, user_id)
 
         # Get task configuration
-        task = task_storage.get_task(task_id, user_id)
+        task = await task_storage.call(task_storage.get_task, task_id, user_id)
         task_browser_config = task.get("browser_config", {}) if task else {}
 
+        # Serve repeated deterministic tasks from the result cache. Tasks that
+        # save browser data need a real browser session, so they always run.
+        cache_key = None
+        if RESULT_CACHE_ENABLED and not (task and task.get("save_browser_data")):
+            cache_key = make_result_cache_key(
+                instruction,
+                ai_provider,
+                get_model_id(ai_provider),
+                task.get("output_model_schema") if task else None,
+                browser_config=task_browser_config,
+                use_vision=task.get("use_vision") if task else None,
+                user_id=user_id,
+            )
+            cached_output = result_cache.get(cache_key)
+            if cached_output is not None:
+                logger.info(f"Task {task_id}: Using cached result, skipping browser and LLM")
+                await task_storage.call(
+                    task_storage.finalize_task, task_id, user_id, TaskStatus.FINISHED, output=cached_output
+                )
+                await notify_task_completed(task, task_id, cached_output)
+                return
+
         # Set up LLM and browser
         llm = get_llm(ai_provider)
-        browser, browser_info = configure_browser_profile(task_browser_config)
+        browser, browser_info = await configure_browser_profile(task_browser_config)
         logger.info(f"Task {task_id}: Browser configuration: {browser_info}")
 
         # Process agent configuration options
@@ -149,7 +242,14 @@ async def execute_task(
         sensitive_data = get_sensitive_data()
         logger.info(f"Task {task_id}: MAX_HISTORY_ITEMS={MAX_HISTORY_ITEMS}")
         agent_config = create_agent_config(
-            instruction, llm, sensitive_data, browser, use_vision, output_model, MAX_HISTORY_ITEMS
+            instruction,
+            llm,
+            sensitive_data,
+            browser,
+            use_vision,
+            output_model,
+            MAX_HISTORY_ITEMS,
+            step_callback=make_step_recorder(task_id, user_id, task_storage),
         )
         logger.info(f"Agent config keys: {list(agent_config.keys())}")
         logger.info(f"Agent config max_history_items: {agent_config.get('max_history_items')}")
@@ -169,38 +269,39 @@ async def execute_task(
         else:
             logger.warning(f"Task {task_id}: Agent has no eventbus attribute")
 
-        task_storage.set_task_agent(task_id, agent, user_id)
+        await task_storage.call(task_storage.set_task_agent, task_id, agent, user_id)
 
         # Execute task without automated screenshots
         result = await agent.run()
 
-        # Process results
-        task_storage.mark_task_finished(task_id, user_id, TaskStatus.FINISHED)
-        await process_task_result(result, task_id, user_id, task_storage)
-        await collect_browser_cookies(agent, task_id, user_id, task_storage)
-        
+        # Store status, finish time and output together, so pollers never see
+        # a finished task without its output
+        output = get_task_output(result)
+        await task_storage.call(task_storage.finalize_task, task_id, user_id, TaskStatus.FINISHED, output=output)
+        await collect_browser_cookies(agent, task_id, user_id, task_storage, task)
+
+        # Only cache runs the agent itself reported as successful
+        if (
+            cache_key is not None
+            and output
+            and isinstance(result, AgentHistoryList)
+            and result.is_successful()
+        ):
+            result_cache.set(cache_key, output, RESULT_CACHE_TTL)
+
         # Trigger webhook on successful completion
-        webhook_url = task.get("webhook_url") if task else None
-        webhook_events = task.get("webhook_events", []) if task else []
-        if webhook_url and "task.completed" in webhook_events:
-            output = task_storage.get_task(task_id, user_id).get("output") if task_storage.get_task(task_id, user_id) else None
-            await trigger_webhook(
-                webhook_url=webhook_url,
-                task_id=task_id,
-                status="completed",
-                event_type="task.completed",
-                result=output
-            )
+        await notify_task_completed(task, task_id, output)
 
     except Exception as e:
         logger.exception(f"Error executing task {task_id}")
-        task_storage.update_task_status(task_id, TaskStatus.FAILED, user_id)
-        task_storage.set_task_error(task_id, str(e), user_id)
-        task_storage.mark_task_finished(task_id, user_id, TaskStatus.FAILED)
+        await task_storage.call(task_storage.finalize_task, task_id, user_id, TaskStatus.FAILED, error=str(e))
         
         # Trigger webhook on failure
         try:
-            task = task_storage.get_task(task_id, user_id)
+            # Webhook settings never change after creation, so the copy read
+            # at the start is still good; only read it if we failed before that
+            if task is None:
+                task = await task_storage.call(task_storage.get_task, task_id, user_id)
             webhook_url = task.get("webhook_url") if task else None
             webhook_events = task.get("webhook_events", []) if task else []
             if webhook_url and "task.failed" in webhook_events:
@@ -217,39 +318,95 @@ async def execute_task(
         await cleanup_task(browser, task_id, user_id, task_storage)
 
 
+def can_schedule_task() -> bool:
+    """Check whether another task can be queued without exceeding MAX_PENDING_TASKS"""
+    return len(_background_tasks) < MAX_PENDING_TASKS
+
+
+async def _execute_task_when_ready(
+    task_id: str, instruction: str, ai_provider: str, user_id: str, task_storage
+):
+    """Wait for a free execution slot, then run the task"""
+    async with _task_semaphore:
+        _queued_tasks.pop((user_id, task_id), None)
+        # The task may have been stopped while it was waiting for a slot (possibly
+        # through another worker); claim it with a conditional write so a stop
+        # landing right now is not overwritten with RUNNING
+        started = await task_storage.call(
+            task_storage.update_task_if_status, task_id, TaskStatus.CREATED,
+            {"status": TaskStatus.RUNNING}, user_id,
+        )
+        if not started:
+            logger.info(f"Task {task_id} no longer pending, skipping execution")
+            return
+        await execute_task(task_id, instruction, ai_provider, user_id, task_storage)
+
+
+def schedule_task(
+    task_id: str, instruction: str, ai_provider: str, user_id: str = DEFAULT_USER_ID, task_storage=None
+) -> asyncio.Task:
+    """Run a task in the background, at most MAX_CONCURRENT_TASKS at a time"""
+    background_task = asyncio.create_task(
+        _execute_task_when_ready(task_id, instruction, ai_provider, user_id, task_storage)
+    )
+    _background_tasks.add(background_task)
+    background_task.add_done_callback(_background_tasks.discard)
+
+    key = (user_id, task_id)
+    _queued_tasks[key] = background_task
+    background_task.add_done_callback(lambda _: _queued_tasks.pop(key, None))
+    return background_task
+
+
+def cancel_queued_task(task_id: str, user_id: str = DEFAULT_USER_ID) -> bool:
+    """Cancel a task still waiting for an execution slot in this process
+
+    Frees its MAX_PENDING_TASKS place right away instead of when a slot opens.
+    Returns False if the task is not queued here (already started, or scheduled
+    by another worker, which skips it once it gets a slot).
+    """
+    queued = _queued_tasks.pop((user_id, task_id), None)
+    if queued is None:
+        return False
+    queued.cancel()
+    return True
+
+
 async def cleanup_all_tasks(task_storage):
     """Clean up all running tasks on shutdown"""
     try:
         # Get all tasks from storage
-        all_tasks = task_storage.list_tasks()
+        all_tasks = await task_storage.call(task_storage.list_tasks)
         if isinstance(all_tasks, dict) and "tasks" in all_tasks:
             tasks_list = all_tasks["tasks"]
 
             for task_summary in tasks_list:
                 task_id = task_summary["id"]
-                task = task_storage.get_task(task_id)
+                task = await task_storage.call(task_storage.get_task, task_id)
 
                 if task and task.get("status") in [
                     TaskStatus.RUNNING,
                     TaskStatus.PAUSED,
                 ]:
+                    # Get agent and try to stop it gracefully; with shared storage,
+                    # tasks without a local agent belong to another worker
+                    agent = await task_storage.call(task_storage.get_task_agent, task_id)
+                    if not agent:
+                        continue
+
                     logger.info(f"Cleaning up running task: {task_id}")
 
-                    # Get agent and try to stop it gracefully
-                    agent = task_storage.get_task_agent(task_id)
-                    if agent:
-                        try:
-                            agent.stop()  # No parameters - just sets stopped flag
-                        except Exception as e:
-                            logger.warning(
-                                f"Error stopping agent for task {task_id}: {e}"
-                            )
-                        # Remove agent from storage to enable garbage collection
-                        task_storage.remove_task_agent(task_id)
+                    try:
+                        agent.stop()  # No parameters - just sets stopped flag
+                    except Exception as e:
+                        logger.warning(
+                            f"Error stopping agent for task {task_id}: {e}"
+                        )
+                    # Remove agent from storage to enable garbage collection
+                    await task_storage.call(task_storage.remove_task_agent, task_id)
 
                     # Update task status
-                    task_storage.update_task_status(task_id, TaskStatus.STOPPED)
-                    task_storage.mark_task_finished(task_id, status=TaskStatus.STOPPED)
+                    await task_storage.call(task_storage.finalize_task, task_id, status=TaskStatus.STOPPED)
 
         logger.info("Task cleanup completed")
     except Exception as e:
@@ -1,19 +1,127 @@
 """LLM provider configuration with API Key pool support"""
 
 import os
+from typing import Optional
 
-from browser_use.llm import (
-    ChatAnthropic,
-    ChatOpenAI,
-    ChatGoogle,
-    ChatOllama,
-    ChatAzureOpenAI,
-    ChatAWSBedrock,
-)
+import httpx
 
 from task.llm_pool import get_pooled_api_key
 
 
+# Environment variable and default model ID for each provider
+_MODEL_IDS = {
+    "anthropic": ("ANTHROPIC_MODEL_ID", "claude-3-opus-20240229"),
+    "google": ("GOOGLE_MODEL_ID", "gemini-1.5-pro"),
+    "ollama": ("OLLAMA_MODEL_ID", "llama3"),
+    "azure": ("AZURE_MODEL_ID", "gpt-4o"),
+    "bedrock": ("BEDROCK_MODEL_ID", "anthropic.claude-3-sonnet-20240229-v1:0"),
+    "openai": ("OPENAI_MODEL_ID", "gpt-4o"),
+}
+
+
+def get_model_id(ai_provider: str) -> str:
+    """Get the model ID configured for a provider (unknown providers use OpenAI)"""
+    env_var, default = _MODEL_IDS.get(ai_provider, _MODEL_IDS["openai"])
+    return os.environ.get(env_var, default)
+
+
+# Connection pool shared by all HTTP-based LLM clients, so concurrent tasks
+# reuse keep-alive connections instead of opening new TLS sessions per client
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get the shared HTTP client for LLM requests (created on first use)"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=200, max_keepalive_connections=50),
+            # Same timeouts the provider SDKs use by default
+            timeout=httpx.Timeout(600.0, connect=5.0),
+        )
+    return _http_client
+
+
+async def close_http_client() -> None:
+    """Close the shared HTTP client"""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+def _create_anthropic():
+    from browser_use.llm import ChatAnthropic
+
+    return ChatAnthropic(
+        model=get_model_id("anthropic"),
+        api_key=get_pooled_api_key("anthropic"),
+        http_client=get_http_client(),
+    )
+
+
+def _create_google():
+    from browser_use.llm import ChatGoogle
+
+    return ChatGoogle(
+        model=get_model_id("google"),
+        api_key=get_pooled_api_key("google"),
+    )
+
+
+def _create_ollama():
+    from browser_use.llm import ChatOllama
+
+    # Ollama 不需要 API Key,保持不变
+    return ChatOllama(model=get_model_id("ollama"))
+
+
+def _create_azure():
+    from browser_use.llm import ChatAzureOpenAI
+
+    # Azure 配置较复杂,暂时保持原样,未来可扩展多 Key 支持
+    return ChatAzureOpenAI(
+        model=get_model_id("azure"),
+        azure_deployment=os.environ.get("AZURE_DEPLOYMENT_NAME"),
+        api_version=os.environ.get("AZURE_API_VERSION", "2023-05-15"),
+        azure_endpoint=os.environ.get("AZURE_ENDPOINT"),
+        http_client=get_http_client(),
+    )
+
+
+def _create_bedrock():
+    from browser_use.llm import ChatAWSBedrock
+
+    # Bedrock 使用 AWS 凭证,暂时保持原样
+    return ChatAWSBedrock(model=get_model_id("bedrock"))
+
+
+def _create_openai():
+    from browser_use.llm import ChatOpenAI
+
+    api_key = get_pooled_api_key("openai")
+    base_url = os.environ.get("OPENAI_BASE_URL")
+    model = get_model_id("openai")
+
+    if base_url:
+        return ChatOpenAI(model=model, base_url=base_url, api_key=api_key, http_client=get_http_client())
+    else:
+        return ChatOpenAI(model=model, api_key=api_key, http_client=get_http_client())
+
+
+# Provider name -> LLM factory (unknown providers fall back to OpenAI).
+# Each factory imports its client class, so only providers in use are loaded.
+# "mistral" is not supported by browser_use.llm yet
+_LLM_FACTORIES = {
+    "anthropic": _create_anthropic,
+    "google": _create_google,
+    "ollama": _create_ollama,
+    "azure": _create_azure,
+    "bedrock": _create_bedrock,
+    "openai": _create_openai,
+}
+
+
 def get_llm(ai_provider: str):
     """Get LLM based on provider with API Key rotation support
 
@@ -28,46 +136,4 @@ def get_llm(ai_provider: str):
     Returns:
         LLM instance configured with rotated API Key
     """
-    if ai_provider == "anthropic":
-        api_key = get_pooled_api_key("anthropic")
-        return ChatAnthropic(
-            model=os.environ.get("ANTHROPIC_MODEL_ID", "claude-3-opus-20240229"),
-            api_key=api_key
-        )
-    # elif ai_provider == "mistral":
-    #     return LLMProvider.MISTRAL(
-    #         model=os.environ.get("MISTRAL_MODEL_ID", "mistral-large-latest")
-    #     )
-    elif ai_provider == "google":
-        api_key = get_pooled_api_key("google")
-        return ChatGoogle(
-            model=os.environ.get("GOOGLE_MODEL_ID", "gemini-1.5-pro"),
-            api_key=api_key
-        )
-    elif ai_provider == "ollama":
-        # Ollama 不需要 API Key,保持不变
-        return ChatOllama(model=os.environ.get("OLLAMA_MODEL_ID", "llama3"))
-    elif ai_provider == "azure":
-        # Azure 配置较复杂,暂时保持原样,未来可扩展多 Key 支持
-        return ChatAzureOpenAI(
-            model=os.environ.get("AZURE_MODEL_ID", "gpt-4o"),
-            azure_deployment=os.environ.get("AZURE_DEPLOYMENT_NAME"),
-            api_version=os.environ.get("AZURE_API_VERSION", "2023-05-15"),
-            azure_endpoint=os.environ.get("AZURE_ENDPOINT"),
-        )
-    elif ai_provider == "bedrock":
-        # Bedrock 使用 AWS 凭证,暂时保持原样
-        return ChatAWSBedrock(
-            model=os.environ.get(
-                "BEDROCK_MODEL_ID", "anthropic.claude-3-sonnet-20240229-v1:0"
-            )
-        )
-    else:  # default to OpenAI
-        api_key = get_pooled_api_key("openai")
-        base_url = os.environ.get("OPENAI_BASE_URL")
-        model = os.environ.get("OPENAI_MODEL_ID", "gpt-4o")
-
-        if base_url:
-            return ChatOpenAI(model=model, base_url=base_url, api_key=api_key)
-        else:
-            return ChatOpenAI(model=model, api_key=api_key)
+    return _LLM_FACTORIES.get(ai_provider, _create_openai)()
@@ -0,0 +1,93 @@
+"""Result cache for repeated deterministic tasks
+
+When CACHE_DETERMINISTIC is enabled, the final output of a successful task is
+cached under a hash of everything that determines it: instruction, provider,
+model, output schema, browser and vision settings, and the requesting user.
+Running the same task again returns the cached output without starting a
+browser or calling the LLM.
+"""
+
+import hashlib
+import json
+import os
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Optional, Tuple
+
+
+RESULT_CACHE_ENABLED = os.environ.get("CACHE_DETERMINISTIC", "false").lower() in ("1", "true")
+RESULT_CACHE_TTL = int(os.environ.get("RESULT_CACHE_TTL", "3600"))
+
+
+class ResultCache(ABC):
+    """Abstract base class for task result cache backends"""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        """Get a cached result, or None if missing or expired"""
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: str, ttl: int = RESULT_CACHE_TTL) -> None:
+        """Cache a result for ttl seconds"""
+        pass
+
+
+class InMemoryResultCache(ResultCache):
+    """In-process result cache with per-entry expiry and a size limit"""
+
+    def __init__(self, maxsize: int = 1024):
+        self._maxsize = maxsize
+        # key -> (expires_at, value), in insertion order for eviction
+        self._entries: Dict[str, Tuple[float, str]] = {}
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        return value
+
+    def set(self, key: str, value: str, ttl: int = RESULT_CACHE_TTL) -> None:
+        self._entries.pop(key, None)
+        if len(self._entries) >= self._maxsize:
+            # Evict the oldest entry
+            del self._entries[next(iter(self._entries))]
+        self._entries[key] = (time.monotonic() + ttl, value)
+
+
+def make_result_cache_key(
+    instruction: str,
+    ai_provider: str,
+    model_id: str,
+    output_model_schema: Optional[str] = None,
+    browser_config: Optional[Dict] = None,
+    use_vision: Optional[str] = None,
+    user_id: Optional[str] = None,
+) -> str:
+    """Build the cache key for a task from everything that determines its result
+
+    browser_config matters because e.g. use_custom_chrome runs in a logged-in
+    profile, and user_id keeps one user's results from being served to another.
+    """
+    payload = json.dumps(
+        {
+            "task": instruction,
+            "provider": ai_provider,
+            "model": model_id,
+            "output_model_schema": output_model_schema,
+            "browser_config": browser_config or {},
+            "use_vision": use_vision,
+            "user_id": user_id,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# Global result cache (initialized at module load)
+result_cache: ResultCache = InMemoryResultCache()
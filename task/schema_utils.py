@@ -2,7 +2,7 @@
 
 import json
 from enum import Enum
-from typing import Any, Optional, get_args, get_origin
+from typing import Any, Optional
 
 from pydantic import BaseModel, Field, create_model
 
@@ -1,20 +1,38 @@
+import os
+from typing import Dict, Optional
+
 from task.storage.base import TaskStorage
 from task.storage.memory import InMemoryTaskStorage
+from task.storage.redis_storage import RedisTaskStorage
+
+__all__ = ["TaskStorage", "InMemoryTaskStorage", "RedisTaskStorage", "get_task_storage"]
+
+# One shared instance per storage type, so every module sees the same tasks
+_storage_instances: Dict[str, TaskStorage] = {}
 
-__all__ = ["TaskStorage", "InMemoryTaskStorage", "get_task_storage"]
 
 # Factory function to get the default task storage implementation
-def get_task_storage(storage_type="memory") -> TaskStorage:
+def get_task_storage(storage_type: Optional[str] = None) -> TaskStorage:
     """
     Factory function to get a task storage implementation.
-    
+
     Args:
-        storage_type: Type of storage to use (default: "memory")
-        
+        storage_type: Type of storage to use, "memory" or "redis"
+            (default: TASK_STORAGE environment variable, else "memory")
+
     Returns:
-        An instance of TaskStorage implementation
+        The shared instance of the TaskStorage implementation
     """
-    if storage_type == "memory":
-        return InMemoryTaskStorage()
-    else:
-        raise ValueError(f"Unknown storage type: {storage_type}") 
\ No newline at end of file
+    storage_type = storage_type or os.environ.get("TASK_STORAGE", "memory")
+
+    if storage_type not in _storage_instances:
+        if storage_type == "memory":
+            _storage_instances[storage_type] = InMemoryTaskStorage()
+        elif storage_type == "redis":
+            _storage_instances[storage_type] = RedisTaskStorage(
+                os.environ.get("REDIS_URL", "redis://localhost:6379/0")
+            )
+        else:
+            raise ValueError(f"Unknown storage type: {storage_type}")
+
+    return _storage_instances[storage_type]
@@ -1,9 +1,12 @@
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Dict, Optional, Any
+from typing import Dict, Optional, Any, AsyncIterator, Callable, List, Tuple, TypeVar
 
 
 DEFAULT_USER_ID = "default"
 
+T = TypeVar("T")
+
 
 class TaskStorage(ABC):
     """
@@ -11,6 +14,20 @@ class TaskStorage(ABC):
     Defines the interface for storing and retrieving tasks.
     """
 
+    # True when methods block on network I/O; code running on the event loop
+    # should then go through call() instead of calling them directly
+    blocking = False
+
+    async def call(self, method: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run one of this storage's methods from the event loop without blocking it
+
+        Blocking backends run it on the default thread pool. Others run it inline,
+        since the in-memory backend's watch_task wake-ups must stay on the loop thread.
+        """
+        if self.blocking:
+            return await asyncio.to_thread(method, *args, **kwargs)
+        return method(*args, **kwargs)
+
     @abstractmethod
     def create_task(self, task_id: str, task_data: Dict, user_id: str = DEFAULT_USER_ID) -> None:
         """Create a new task with the specified ID and data"""
@@ -32,8 +49,23 @@ class TaskStorage(ABC):
         pass
 
     @abstractmethod
-    def list_tasks(self, user_id: str = DEFAULT_USER_ID, page: int = 1, per_page: int = 100) -> Dict:
-        """List all tasks for a user with pagination"""
+    def list_tasks(self, user_id: str = DEFAULT_USER_ID, page: int = 1, per_page: int = 100,
+                   after: Optional[str] = None) -> Dict:
+        """List all tasks for a user with pagination, newest first
+
+        When after is given (a task ID from a previous page's "next"), page is ignored and
+        the listing continues right after that task. Raises KeyError for an unknown cursor.
+        """
+        pass
+
+    @abstractmethod
+    def update_task_if_status(self, task_id: str, expected_status: str, update_data: Dict,
+                              user_id: str = DEFAULT_USER_ID) -> bool:
+        """Atomically update a task only if its status is expected_status
+
+        Returns whether the update was applied (False if the task does not exist or
+        has another status), so two parties racing on a transition cannot both win.
+        """
         pass
 
     @abstractmethod
@@ -51,6 +83,13 @@ class TaskStorage(ABC):
         """Add a step to a task's execution history"""
         pass
 
+    @abstractmethod
+    def get_task_steps(
+        self, task_id: str, user_id: str = DEFAULT_USER_ID, since: int = 0
+    ) -> Optional[Tuple[List[Dict], int]]:
+        """Get a task's steps from index since onwards and its total step count, or None if the task does not exist"""
+        pass
+
     @abstractmethod
     def add_task_media(self, task_id: str, media_data: Dict, user_id: str = DEFAULT_USER_ID) -> None:
         """Add media information to a task"""
@@ -61,6 +100,11 @@ class TaskStorage(ABC):
         """Get the agent instance associated with a task"""
         pass
 
+    @abstractmethod
+    def get_task_and_agent(self, task_id: str, user_id: str = DEFAULT_USER_ID) -> Tuple[Optional[Dict], Any]:
+        """Get a task and its agent instance in a single lookup"""
+        pass
+
     @abstractmethod
     def set_task_agent(self, task_id: str, agent: Any, user_id: str = DEFAULT_USER_ID) -> None:
         """Set the agent instance for a task"""
@@ -85,4 +129,30 @@ class TaskStorage(ABC):
     def mark_task_finished(self, task_id: str, user_id: str = DEFAULT_USER_ID, 
                           status: str = "finished") -> None:
         """Mark a task as finished with timestamp"""
-        pass 
\ No newline at end of file
+        pass
+
+    @abstractmethod
+    def finalize_task(self, task_id: str, user_id: str = DEFAULT_USER_ID,
+                      status: str = "finished", output: Optional[str] = None,
+                      error: Optional[str] = None) -> None:
+        """Move a task to a terminal status, setting finish time and output/error in one update"""
+        pass
+
+    @abstractmethod
+    def watch_task(self, task_id: str, user_id: str = DEFAULT_USER_ID,
+                   timeout: float = 15.0) -> AsyncIterator[Optional[Dict]]:
+        """Yield the task now and again after each change, until it reaches a terminal status
+
+        Yields None when nothing changed within timeout, so callers can send keep-alives.
+        Stops when the task does not exist or is deleted.
+        """
+        pass
+
+    @abstractmethod
+    def close_watchers(self) -> None:
+        """End every watch_task iterator, now and in the future
+
+        Called on server shutdown: open live-view streams would otherwise keep
+        their connections, and the server, alive until their tasks finish.
+        """
+        pass
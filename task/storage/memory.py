@@ -1,8 +1,11 @@
-from typing import Dict, Optional, Any
-from datetime import datetime, UTC
+from typing import Dict, Optional, Any, AsyncIterator, List, Tuple
+import asyncio
+import bisect
 import logging
 
+from task.constants import TERMINAL_STATUSES
 from task.storage.base import TaskStorage, DEFAULT_USER_ID
+from task.utils import utc_now_iso
 
 logger = logging.getLogger("browser-use-bridge")
 
@@ -17,62 +20,130 @@ class InMemoryTaskStorage(TaskStorage):
         # Top-level dictionary is keyed by user_id
         # Each user has a dictionary of tasks keyed by task_id
         self._tasks: Dict[str, Dict[str, Dict]] = {}
+        # Per-user (created_at, task_id) keys kept sorted oldest first, so list_tasks
+        # pages by slicing instead of sorting every task on each call
+        self._order: Dict[str, List[Tuple[str, str]]] = {}
+        # Wake-up events for watch_task, keyed by (user_id, task_id);
+        # an event is replaced after it fires so each change wakes watchers once
+        self._update_events: Dict[tuple, asyncio.Event] = {}
+        # Number of open watch_task iterators per key, so the last one to leave
+        # drops the key's event
+        self._watcher_counts: Dict[tuple, int] = {}
+        self._watchers_closed = False
+
+    def _get_record(self, task_id: str, user_id: str) -> Optional[Dict]:
+        """Get the stored task record itself (agent included), or None, with one lookup"""
+        user_tasks = self._tasks.get(user_id)
+        return user_tasks.get(task_id) if user_tasks is not None else None
+
+    def _require_record(self, task_id: str, user_id: str) -> Dict:
+        """Get the stored task record, raising KeyError if it does not exist"""
+        task = self._get_record(task_id, user_id)
+        if task is None:
+            raise KeyError(f"Task {task_id} not found for user {user_id}")
+        return task
+
+    @staticmethod
+    def _order_key(task_id: str, task_data: Dict) -> Tuple[str, str]:
+        return (task_data.get("created_at") or "", task_id)
+
+    def _unindex(self, task_id: str, task_data: Dict, user_id: str) -> None:
+        """Remove a task from its user's ordered index"""
+        order = self._order[user_id]
+        key = self._order_key(task_id, task_data)
+        idx = bisect.bisect_left(order, key)
+        if idx < len(order) and order[idx] == key:
+            del order[idx]
+
+    def _notify_update(self, task_id: str, user_id: str) -> None:
+        """Wake up everyone watching a task"""
+        event = self._update_events.pop((user_id, task_id), None)
+        if event is not None:
+            event.set()
 
     def create_task(self, task_id: str, task_data: Dict, user_id: str = DEFAULT_USER_ID) -> None:
         """Create a new task with the specified ID and data"""
         # Ensure user exists in storage
         if user_id not in self._tasks:
             self._tasks[user_id] = {}
-        
+            self._order[user_id] = []
+
+        # Replacing a task must not leave its old index entry behind
+        previous = self._tasks[user_id].get(task_id)
+        if previous is not None:
+            self._unindex(task_id, previous, user_id)
+
         # Store the task
         self._tasks[user_id][task_id] = task_data
+        bisect.insort(self._order[user_id], self._order_key(task_id, task_data))
 
     def get_task(self, task_id: str, user_id: str = DEFAULT_USER_ID) -> Optional[Dict]:
         """Get a task by ID"""
-        if user_id not in self._tasks or task_id not in self._tasks[user_id]:
+        task_data = self._get_record(task_id, user_id)
+        if task_data is None:
             return None
         
         # Return a copy of the task data to prevent accidental modifications
         # Exclude agent to avoid serialization issues
-        task_data = self._tasks[user_id][task_id]
         result = {k: v for k, v in task_data.items() if k != "agent"}
         return result
 
     def update_task(self, task_id: str, update_data: Dict, user_id: str = DEFAULT_USER_ID) -> None:
         """Update a task with new data"""
-        if not self.task_exists(task_id, user_id):
-            raise KeyError(f"Task {task_id} not found for user {user_id}")
-        
+        task = self._require_record(task_id, user_id)
+
         # Update the task data
-        self._tasks[user_id][task_id].update(update_data)
+        if "created_at" in update_data:
+            self._unindex(task_id, task, user_id)
+            task.update(update_data)
+            bisect.insort(self._order[user_id], self._order_key(task_id, task))
+        else:
+            task.update(update_data)
+        self._notify_update(task_id, user_id)
+
+    def update_task_if_status(self, task_id: str, expected_status: str, update_data: Dict,
+                              user_id: str = DEFAULT_USER_ID) -> bool:
+        """Atomically update a task only if its status is expected_status"""
+        task = self._get_record(task_id, user_id)
+        if task is None or task.get("status") != expected_status:
+            return False
+
+        self.update_task(task_id, update_data, user_id)
+        return True
 
     def delete_task(self, task_id: str, user_id: str = DEFAULT_USER_ID) -> bool:
         """Delete a task by ID"""
-        if not self.task_exists(task_id, user_id):
+        task = self._tasks.get(user_id, {}).pop(task_id, None)
+        if task is None:
             return False
-        
-        del self._tasks[user_id][task_id]
+
+        self._unindex(task_id, task, user_id)
+        self._notify_update(task_id, user_id)
         return True
 
-    def list_tasks(self, user_id: str = DEFAULT_USER_ID, page: int = 1, per_page: int = 100) -> Dict:
-        """List all tasks for a user with pagination"""
+    def list_tasks(self, user_id: str = DEFAULT_USER_ID, page: int = 1, per_page: int = 100,
+                   after: Optional[str] = None) -> Dict:
+        """List all tasks for a user with pagination, newest first"""
         if user_id not in self._tasks:
-            return {"tasks": [], "total": 0, "page": page, "per_page": per_page}
+            if after is not None:
+                raise KeyError(f"Task {after} not found for user {user_id}")
+            return {"tasks": [], "total": 0, "page": page, "per_page": per_page, "next": None}
         
-        # Get all tasks for the user
         user_tasks = self._tasks[user_id]
-        
-        # Sort tasks by created_at timestamp (newest first)
-        sorted_tasks = sorted(
-            user_tasks.items(),
-            key=lambda x: x[1].get("created_at", ""),
-            reverse=True
-        )
-        
-        # Paginate results
-        start_idx = (page - 1) * per_page
+        order = self._order[user_id]
+        total = len(order)
+
+        # Positions below count from the newest task; the index itself is oldest first
+        if after is not None:
+            if after not in user_tasks:
+                raise KeyError(f"Task {after} not found for user {user_id}")
+            # Seek past the cursor task
+            start_idx = total - bisect.bisect_left(order, self._order_key(after, user_tasks[after]))
+        else:
+            start_idx = (page - 1) * per_page
         end_idx = start_idx + per_page
-        paginated_tasks = sorted_tasks[start_idx:end_idx]
+        page_keys = order[max(total - end_idx, 0):max(total - start_idx, 0)]
+        paginated_tasks = [(task_id, user_tasks[task_id]) for _, task_id in reversed(page_keys)]
         
         # Format task summaries
         task_list = []
@@ -89,93 +160,150 @@ class InMemoryTaskStorage(TaskStorage):
         
         return {
             "tasks": task_list,
-            "total": len(user_tasks),
+            "total": total,
             "page": page,
-            "per_page": per_page
+            "per_page": per_page,
+            # Cursor for the following page, None on the last one
+            "next": task_list[-1]["id"] if task_list and end_idx < total else None,
         }
 
     def task_exists(self, task_id: str, user_id: str = DEFAULT_USER_ID) -> bool:
         """Check if a task exists"""
-        return user_id in self._tasks and task_id in self._tasks[user_id]
+        return self._get_record(task_id, user_id) is not None
 
     def update_task_status(self, task_id: str, status: str, user_id: str = DEFAULT_USER_ID) -> None:
         """Update a task's status"""
-        if not self.task_exists(task_id, user_id):
-            raise KeyError(f"Task {task_id} not found for user {user_id}")
-        
-        self._tasks[user_id][task_id]["status"] = status
+        task = self._require_record(task_id, user_id)
+        task["status"] = status
+        self._notify_update(task_id, user_id)
 
     def add_task_step(self, task_id: str, step_data: Dict, user_id: str = DEFAULT_USER_ID) -> None:
         """Add a step to a task's execution history"""
-        if not self.task_exists(task_id, user_id):
-            raise KeyError(f"Task {task_id} not found for user {user_id}")
-        
-        task = self._tasks[user_id][task_id]
+        task = self._require_record(task_id, user_id)
         
         # Initialize steps array if not present
         if "steps" not in task:
             task["steps"] = []
         
         task["steps"].append(step_data)
+        self._notify_update(task_id, user_id)
         logger.info(f"Added step {step_data.get('step')} for task {task_id}")
 
+    def get_task_steps(
+        self, task_id: str, user_id: str = DEFAULT_USER_ID, since: int = 0
+    ) -> Optional[Tuple[List[Dict], int]]:
+        """Get a task's steps from index since onwards and its total step count, or None if the task does not exist"""
+        task = self._get_record(task_id, user_id)
+        if task is None:
+            return None
+        steps = task.get("steps", [])
+        return steps[since:], len(steps)
+
     def add_task_media(self, task_id: str, media_data: Dict, user_id: str = DEFAULT_USER_ID) -> None:
         """Add media information to a task"""
-        if not self.task_exists(task_id, user_id):
-            raise KeyError(f"Task {task_id} not found for user {user_id}")
-        
-        task = self._tasks[user_id][task_id]
+        task = self._require_record(task_id, user_id)
         
         # Initialize media list if not present
         if "media" not in task:
             task["media"] = []
         
         task["media"].append(media_data)
+        self._notify_update(task_id, user_id)
 
     def get_task_agent(self, task_id: str, user_id: str = DEFAULT_USER_ID) -> Any:
         """Get the agent instance associated with a task"""
-        if not self.task_exists(task_id, user_id):
-            return None
-        
-        return self._tasks[user_id][task_id].get("agent")
+        task = self._get_record(task_id, user_id)
+        return task.get("agent") if task is not None else None
+
+    def get_task_and_agent(self, task_id: str, user_id: str = DEFAULT_USER_ID) -> Tuple[Optional[Dict], Any]:
+        """Get a task and its agent instance in a single lookup"""
+        task_data = self._get_record(task_id, user_id)
+        if task_data is None:
+            return None, None
+
+        task = {k: v for k, v in task_data.items() if k != "agent"}
+        return task, task_data.get("agent")
 
     def set_task_agent(self, task_id: str, agent: Any, user_id: str = DEFAULT_USER_ID) -> None:
         """Set the agent instance for a task"""
-        if not self.task_exists(task_id, user_id):
-            raise KeyError(f"Task {task_id} not found for user {user_id}")
-
-        self._tasks[user_id][task_id]["agent"] = agent
+        task = self._require_record(task_id, user_id)
+        task["agent"] = agent
 
     def remove_task_agent(self, task_id: str, user_id: str = DEFAULT_USER_ID) -> None:
         """Remove the agent instance from a task to free memory"""
-        if not self.task_exists(task_id, user_id):
+        task = self._get_record(task_id, user_id)
+        if task is None:
             logger.warning(f"Task {task_id} not found for user {user_id} when removing agent")
             return
 
-        if "agent" in self._tasks[user_id][task_id]:
-            del self._tasks[user_id][task_id]["agent"]
+        if task.pop("agent", None) is not None:
             logger.info(f"Removed agent for task {task_id}")
 
     def set_task_output(self, task_id: str, output: str, user_id: str = DEFAULT_USER_ID) -> None:
         """Set the output result of a task"""
-        if not self.task_exists(task_id, user_id):
-            raise KeyError(f"Task {task_id} not found for user {user_id}")
-        
-        self._tasks[user_id][task_id]["output"] = output
+        task = self._require_record(task_id, user_id)
+        task["output"] = output
+        self._notify_update(task_id, user_id)
 
     def set_task_error(self, task_id: str, error: str, user_id: str = DEFAULT_USER_ID) -> None:
         """Set the error message for a task"""
-        if not self.task_exists(task_id, user_id):
-            raise KeyError(f"Task {task_id} not found for user {user_id}")
-        
-        self._tasks[user_id][task_id]["error"] = error
+        task = self._require_record(task_id, user_id)
+        task["error"] = error
+        self._notify_update(task_id, user_id)
 
     def mark_task_finished(self, task_id: str, user_id: str = DEFAULT_USER_ID, 
                           status: str = "finished") -> None:
         """Mark a task as finished with timestamp"""
-        if not self.task_exists(task_id, user_id):
-            raise KeyError(f"Task {task_id} not found for user {user_id}")
-        
-        task = self._tasks[user_id][task_id]
+        task = self._require_record(task_id, user_id)
         task["status"] = status
-        task["finished_at"] = datetime.now(UTC).isoformat() + "Z" 
\ No newline at end of file
+        task["finished_at"] = utc_now_iso()
+        self._notify_update(task_id, user_id)
+
+    def finalize_task(self, task_id: str, user_id: str = DEFAULT_USER_ID,
+                      status: str = "finished", output: Optional[str] = None,
+                      error: Optional[str] = None) -> None:
+        """Move a task to a terminal status, setting finish time and output/error in one update"""
+        task = self._require_record(task_id, user_id)
+        update_data = {"status": status, "finished_at": utc_now_iso()}
+        if output is not None:
+            update_data["output"] = output
+        if error is not None:
+            update_data["error"] = error
+        task.update(update_data)
+        self._notify_update(task_id, user_id)
+
+    async def watch_task(self, task_id: str, user_id: str = DEFAULT_USER_ID,
+                         timeout: float = 15.0) -> AsyncIterator[Optional[Dict]]:
+        """Yield the task now and again after each change, until it reaches a terminal status"""
+        key = (user_id, task_id)
+        self._watcher_counts[key] = self._watcher_counts.get(key, 0) + 1
+        try:
+            while not self._watchers_closed:
+                # Register before reading so a change made right after the read still wakes us
+                event = self._update_events.setdefault(key, asyncio.Event())
+                task = self.get_task(task_id, user_id)
+                if task is not None:
+                    yield task
+                if task is None or task.get("status") in TERMINAL_STATUSES:
+                    return
+
+                while True:
+                    try:
+                        await asyncio.wait_for(event.wait(), timeout)
+                        break
+                    except asyncio.TimeoutError:
+                        yield None
+        finally:
+            # Also runs when the consumer goes away mid-stream (client disconnect)
+            remaining = self._watcher_counts.pop(key) - 1
+            if remaining:
+                self._watcher_counts[key] = remaining
+            else:
+                self._update_events.pop(key, None)
+
+    def close_watchers(self) -> None:
+        """End every watch_task iterator, now and in the future"""
+        self._watchers_closed = True
+        for event in self._update_events.values():
+            event.set()
+        self._update_events.clear()
@@ -0,0 +1,394 @@
+from typing import Dict, Optional, Any, AsyncIterator, List, Tuple
+import asyncio
+import json
+import logging
+
+from task.constants import TERMINAL_STATUSES
+from task.storage.base import TaskStorage, DEFAULT_USER_ID
+from task.utils import utc_now_iso
+
+try:
+    import redis
+    import redis.asyncio as aioredis
+except ImportError:
+    redis = None
+    aioredis = None
+
+logger = logging.getLogger("browser-use-bridge")
+
+# Fields returned for each task by list_tasks
+_SUMMARY_FIELDS = ("status", "task", "created_at", "finished_at", "live_url")
+
+# Fields stored as Redis lists rather than hash fields, so appends are O(1)
+_LIST_FIELDS = ("steps", "media")
+
+# Fields kept out of the hash: the lists above and the live agent object
+_NON_HASH_FIELDS = frozenset(_LIST_FIELDS + ("agent",))
+
+# Set hash fields only if the task exists, then notify watchers, in one round trip.
+# KEYS[1] = task hash; ARGV[1] = event channel, ARGV[2..] = field/value pairs
+_HSET_IF_EXISTS = """
+if redis.call('EXISTS', KEYS[1]) == 0 then return 0 end
+redis.call('HSET', KEYS[1], unpack(ARGV, 2))
+redis.call('PUBLISH', ARGV[1], '')
+return 1
+"""
+
+# Set hash fields only if the task's status is the expected one, then notify watchers.
+# KEYS[1] = task hash; ARGV[1] = event channel, ARGV[2] = expected JSON status,
+# ARGV[3..] = field/value pairs
+_HSET_IF_STATUS = """
+if redis.call('HGET', KEYS[1], 'status') ~= ARGV[2] then return 0 end
+redis.call('HSET', KEYS[1], unpack(ARGV, 3))
+redis.call('PUBLISH', ARGV[1], '')
+return 1
+"""
+
+# Append to one of the task's lists only if the task exists, then notify watchers.
+# KEYS[1] = task hash, KEYS[2] = list; ARGV[1] = event channel, ARGV[2] = JSON item
+_RPUSH_IF_EXISTS = """
+if redis.call('EXISTS', KEYS[1]) == 0 then return 0 end
+redis.call('RPUSH', KEYS[2], ARGV[2])
+redis.call('PUBLISH', ARGV[1], '')
+return 1
+"""
+
+# Delete a task, its lists and its index entry, then notify watchers.
+# KEYS[1] = task hash, KEYS[2] = steps, KEYS[3] = media, KEYS[4] = user index;
+# ARGV[1] = event channel, ARGV[2] = task ID
+_DELETE_TASK = """
+local created_at = redis.call('HGET', KEYS[1], 'created_at')
+if not created_at then return 0 end
+redis.call('DEL', KEYS[1], KEYS[2], KEYS[3])
+redis.call('ZREM', KEYS[4], cjson.decode(created_at) .. '|' .. ARGV[2])
+redis.call('PUBLISH', ARGV[1], '')
+return 1
+"""
+
+
+class RedisTaskStorage(TaskStorage):
+    """
+    Redis implementation of TaskStorage.
+    Lets several worker processes share tasks and push updates through pub/sub.
+
+    Each task is a hash at task:{user_id}:{task_id} with JSON-encoded field
+    values, plus :steps and :media lists. Each user has a sorted set index
+    tasks:{user_id} whose members are "{created_at}|{task_id}" (all scored 0,
+    so they sort lexicographically, newest last). Agent instances are live
+    Python objects and stay in this process.
+    """
+
+    # Every call is a network round trip
+    blocking = True
+
+    def __init__(self, url: str = "redis://localhost:6379/0"):
+        """Connect to Redis at the given URL"""
+        if redis is None:
+            raise ImportError("Redis task storage requires the 'redis' package: pip install redis")
+
+        self._url = url
+        self._redis = redis.Redis.from_url(url, decode_responses=True)
+        # Created on first watch_task call, inside the running event loop
+        self._async_redis = None
+        self._agents: Dict[Tuple[str, str], Any] = {}
+        # Set by close_watchers to end every watch_task iterator
+        self._watchers_closed = asyncio.Event()
+
+        self._hset_if_exists = self._redis.register_script(_HSET_IF_EXISTS)
+        self._hset_if_status = self._redis.register_script(_HSET_IF_STATUS)
+        self._rpush_if_exists = self._redis.register_script(_RPUSH_IF_EXISTS)
+        self._delete_task = self._redis.register_script(_DELETE_TASK)
+
+    @staticmethod
+    def _task_key(task_id: str, user_id: str) -> str:
+        return f"task:{user_id}:{task_id}"
+
+    @staticmethod
+    def _index_key(user_id: str) -> str:
+        return f"tasks:{user_id}"
+
+    @staticmethod
+    def _channel(task_id: str, user_id: str) -> str:
+        return f"task-events:{user_id}:{task_id}"
+
+    @staticmethod
+    def _index_member(task_id: str, created_at: str) -> str:
+        return f"{created_at}|{task_id}"
+
+    def _set_fields(self, task_id: str, user_id: str, fields: Dict) -> None:
+        """Set hash fields on an existing task, raising KeyError if it does not exist"""
+        args = [self._channel(task_id, user_id)]
+        for key, value in fields.items():
+            args += [key, json.dumps(value)]
+        if not self._hset_if_exists(keys=[self._task_key(task_id, user_id)], args=args):
+            raise KeyError(f"Task {task_id} not found for user {user_id}")
+
+    def _append(self, task_id: str, user_id: str, field: str, item: Dict) -> None:
+        """Append an item to one of a task's lists, raising KeyError if the task does not exist"""
+        task_key = self._task_key(task_id, user_id)
+        if not self._rpush_if_exists(
+            keys=[task_key, f"{task_key}:{field}"],
+            args=[self._channel(task_id, user_id), json.dumps(item)],
+        ):
+            raise KeyError(f"Task {task_id} not found for user {user_id}")
+
+    def create_task(self, task_id: str, task_data: Dict, user_id: str = DEFAULT_USER_ID) -> None:
+        """Create a new task with the specified ID and data"""
+        task_key = self._task_key(task_id, user_id)
+        fields = {k: json.dumps(v) for k, v in task_data.items() if k not in _NON_HASH_FIELDS}
+        fields.setdefault("created_at", json.dumps(""))
+
+        pipe = self._redis.pipeline()
+        pipe.hset(task_key, mapping=fields)
+        for field in _LIST_FIELDS:
+            items = task_data.get(field)
+            if items:
+                pipe.rpush(f"{task_key}:{field}", *(json.dumps(item) for item in items))
+        pipe.zadd(self._index_key(user_id), {self._index_member(task_id, json.loads(fields["created_at"])): 0})
+        pipe.execute()
+
+        if task_data.get("agent") is not None:
+            self._agents[(user_id, task_id)] = task_data["agent"]
+
+    def get_task(self, task_id: str, user_id: str = DEFAULT_USER_ID) -> Optional[Dict]:
+        """Get a task by ID"""
+        task_key = self._task_key(task_id, user_id)
+        pipe = self._redis.pipeline(transaction=False)
+        pipe.hgetall(task_key)
+        for field in _LIST_FIELDS:
+            pipe.lrange(f"{task_key}:{field}", 0, -1)
+        fields, *lists = pipe.execute()
+        if not fields:
+            return None
+
+        task = {k: json.loads(v) for k, v in fields.items()}
+        for field, items in zip(_LIST_FIELDS, lists):
+            task[field] = [json.loads(item) for item in items]
+        return task
+
+    def update_task(self, task_id: str, update_data: Dict, user_id: str = DEFAULT_USER_ID) -> None:
+        """Update a task with new data"""
+        task_key = self._task_key(task_id, user_id)
+        fields = {k: v for k, v in update_data.items() if k not in _NON_HASH_FIELDS}
+        # The index member embeds created_at, so changing it moves the task in the index
+        old_created_at = self._redis.hget(task_key, "created_at") if "created_at" in fields else None
+        if fields:
+            self._set_fields(task_id, user_id, fields)
+        elif not self.task_exists(task_id, user_id):
+            raise KeyError(f"Task {task_id} not found for user {user_id}")
+
+        if old_created_at is not None:
+            pipe = self._redis.pipeline()
+            pipe.zrem(self._index_key(user_id), self._index_member(task_id, json.loads(old_created_at)))
+            pipe.zadd(self._index_key(user_id), {self._index_member(task_id, fields["created_at"]): 0})
+            pipe.execute()
+
+        # Replacing a whole list is rare, it is not worth a script of its own
+        for field in _LIST_FIELDS:
+            if field in update_data:
+                pipe = self._redis.pipeline()
+                pipe.delete(f"{task_key}:{field}")
+                if update_data[field]:
+                    pipe.rpush(f"{task_key}:{field}", *(json.dumps(item) for item in update_data[field]))
+                pipe.publish(self._channel(task_id, user_id), "")
+                pipe.execute()
+
+        if "agent" in update_data:
+            self._agents[(user_id, task_id)] = update_data["agent"]
+
+    def update_task_if_status(self, task_id: str, expected_status: str, update_data: Dict,
+                              user_id: str = DEFAULT_USER_ID) -> bool:
+        """Atomically update a task only if its status is expected_status
+
+        Only hash fields can be updated this way (not steps, media or the agent).
+        """
+        args = [self._channel(task_id, user_id), json.dumps(expected_status)]
+        for key, value in update_data.items():
+            args += [key, json.dumps(value)]
+        return bool(self._hset_if_status(keys=[self._task_key(task_id, user_id)], args=args))
+
+    def delete_task(self, task_id: str, user_id: str = DEFAULT_USER_ID) -> bool:
+        """Delete a task by ID"""
+        task_key = self._task_key(task_id, user_id)
+        deleted = self._delete_task(
+            keys=[task_key, f"{task_key}:steps", f"{task_key}:media", self._index_key(user_id)],
+            args=[self._channel(task_id, user_id), task_id],
+        )
+        self._agents.pop((user_id, task_id), None)
+        return bool(deleted)
+
+    def list_tasks(self, user_id: str = DEFAULT_USER_ID, page: int = 1, per_page: int = 100,
+                   after: Optional[str] = None) -> Dict:
+        """List all tasks for a user with pagination, newest first"""
+        index_key = self._index_key(user_id)
+
+        pipe = self._redis.pipeline(transaction=False)
+        pipe.zcard(index_key)
+        if after is not None:
+            created_at = self._redis.hget(self._task_key(after, user_id), "created_at")
+            if created_at is None:
+                raise KeyError(f"Task {after} not found for user {user_id}")
+            # Exclusive upper bound: everything older than the cursor task
+            cursor = self._index_member(after, json.loads(created_at))
+            pipe.zrevrangebylex(index_key, f"({cursor}", "-", start=0, num=per_page + 1)
+        else:
+            start_idx = (page - 1) * per_page
+            pipe.zrevrange(index_key, start_idx, start_idx + per_page)
+        total, members = pipe.execute()
+
+        # One extra member was fetched to tell whether another page follows
+        has_more = len(members) > per_page
+        task_ids = [member.rpartition("|")[2] for member in members[:per_page]]
+
+        pipe = self._redis.pipeline(transaction=False)
+        for task_id in task_ids:
+            pipe.hmget(self._task_key(task_id, user_id), _SUMMARY_FIELDS)
+        rows = pipe.execute()
+
+        task_list = []
+        for task_id, values in zip(task_ids, rows):
+            task_data = {k: json.loads(v) for k, v in zip(_SUMMARY_FIELDS, values) if v is not None}
+            task_list.append({
+                "id": task_id,
+                "status": task_data.get("status", "unknown"),
+                "task": task_data.get("task", ""),
+                "created_at": task_data.get("created_at", ""),
+                "finished_at": task_data.get("finished_at"),
+                "live_url": task_data.get("live_url", f"/live/{task_id}"),
+            })
+
+        return {
+            "tasks": task_list,
+            "total": total,
+            "page": page,
+            "per_page": per_page,
+            # Cursor for the following page, None on the last one
+            "next": task_list[-1]["id"] if task_list and has_more else None,
+        }
+
+    def task_exists(self, task_id: str, user_id: str = DEFAULT_USER_ID) -> bool:
+        """Check if a task exists"""
+        return bool(self._redis.exists(self._task_key(task_id, user_id)))
+
+    def update_task_status(self, task_id: str, status: str, user_id: str = DEFAULT_USER_ID) -> None:
+        """Update a task's status"""
+        self._set_fields(task_id, user_id, {"status": status})
+
+    def add_task_step(self, task_id: str, step_data: Dict, user_id: str = DEFAULT_USER_ID) -> None:
+        """Add a step to a task's execution history"""
+        self._append(task_id, user_id, "steps", step_data)
+        logger.info(f"Added step {step_data.get('step')} for task {task_id}")
+
+    def get_task_steps(
+        self, task_id: str, user_id: str = DEFAULT_USER_ID, since: int = 0
+    ) -> Optional[Tuple[List[Dict], int]]:
+        """Get a task's steps from index since onwards and its total step count, or None if the task does not exist"""
+        task_key = self._task_key(task_id, user_id)
+        pipe = self._redis.pipeline(transaction=False)
+        pipe.exists(task_key)
+        pipe.lrange(f"{task_key}:steps", since, -1)
+        pipe.llen(f"{task_key}:steps")
+        exists, items, total = pipe.execute()
+        if not exists:
+            return None
+        return [json.loads(item) for item in items], total
+
+    def add_task_media(self, task_id: str, media_data: Dict, user_id: str = DEFAULT_USER_ID) -> None:
+        """Add media information to a task"""
+        self._append(task_id, user_id, "media", media_data)
+
+    def get_task_agent(self, task_id: str, user_id: str = DEFAULT_USER_ID) -> Any:
+        """Get the agent instance associated with a task (only agents running in this process)"""
+        return self._agents.get((user_id, task_id))
+
+    def get_task_and_agent(self, task_id: str, user_id: str = DEFAULT_USER_ID) -> Tuple[Optional[Dict], Any]:
+        """Get a task and its agent instance in a single lookup"""
+        task = self.get_task(task_id, user_id)
+        if task is None:
+            return None, None
+        return task, self._agents.get((user_id, task_id))
+
+    def set_task_agent(self, task_id: str, agent: Any, user_id: str = DEFAULT_USER_ID) -> None:
+        """Set the agent instance for a task"""
+        if not self.task_exists(task_id, user_id):
+            raise KeyError(f"Task {task_id} not found for user {user_id}")
+
+        self._agents[(user_id, task_id)] = agent
+
+    def remove_task_agent(self, task_id: str, user_id: str = DEFAULT_USER_ID) -> None:
+        """Remove the agent instance from a task to free memory"""
+        if self._agents.pop((user_id, task_id), None) is not None:
+            logger.info(f"Removed agent for task {task_id}")
+
+    def set_task_output(self, task_id: str, output: str, user_id: str = DEFAULT_USER_ID) -> None:
+        """Set the output result of a task"""
+        self._set_fields(task_id, user_id, {"output": output})
+
+    def set_task_error(self, task_id: str, error: str, user_id: str = DEFAULT_USER_ID) -> None:
+        """Set the error message for a task"""
+        self._set_fields(task_id, user_id, {"error": error})
+
+    def mark_task_finished(self, task_id: str, user_id: str = DEFAULT_USER_ID,
+                           status: str = "finished") -> None:
+        """Mark a task as finished with timestamp"""
+        self._set_fields(task_id, user_id, {"status": status, "finished_at": utc_now_iso()})
+
+    def finalize_task(self, task_id: str, user_id: str = DEFAULT_USER_ID,
+                      status: str = "finished", output: Optional[str] = None,
+                      error: Optional[str] = None) -> None:
+        """Move a task to a terminal status, setting finish time and output/error in one update"""
+        update_data = {"status": status, "finished_at": utc_now_iso()}
+        if output is not None:
+            update_data["output"] = output
+        if error is not None:
+            update_data["error"] = error
+        self._set_fields(task_id, user_id, update_data)
+
+    async def watch_task(self, task_id: str, user_id: str = DEFAULT_USER_ID,
+                         timeout: float = 15.0) -> AsyncIterator[Optional[Dict]]:
+        """Yield the task now and again after each change, until it reaches a terminal status
+
+        Changes are picked up from pub/sub, so updates made by other worker processes
+        are seen too.
+        """
+        if self._async_redis is None:
+            self._async_redis = aioredis.Redis.from_url(self._url, decode_responses=True)
+
+        pubsub = self._async_redis.pubsub()
+        # Subscribe before reading so a change made right after the read still wakes us
+        await pubsub.subscribe(self._channel(task_id, user_id))
+        closed = asyncio.ensure_future(self._watchers_closed.wait())
+        message = None
+        try:
+            while not closed.done():
+                task = await asyncio.to_thread(self.get_task, task_id, user_id)
+                if task is None:
+                    return
+                yield task
+                if task.get("status") in TERMINAL_STATUSES:
+                    return
+
+                while True:
+                    message = asyncio.ensure_future(
+                        pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+                    )
+                    await asyncio.wait((message, closed), return_when=asyncio.FIRST_COMPLETED)
+                    if not message.done():
+                        # Closed while waiting; the read is cancelled below
+                        return
+                    if message.result() is not None:
+                        break
+                    yield None
+                # Coalesce changes that arrived together into a single re-read
+                while await pubsub.get_message(ignore_subscribe_messages=True, timeout=0) is not None:
+                    pass
+        finally:
+            closed.cancel()
+            if message is not None:
+                message.cancel()
+            await pubsub.aclose()
+
+    def close_watchers(self) -> None:
+        """End every watch_task iterator, now and in the future"""
+        self._watchers_closed.set()
+
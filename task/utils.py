@@ -2,19 +2,40 @@
 
 import os
 import asyncio
-from datetime import datetime, UTC
+import time
 from typing import Optional, Dict, Any
 
 from task.constants import logger
 
+# Imported at startup so the first webhook doesn't pay the import cost
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+
+def utc_now_iso() -> str:
+    """Current UTC time as an ISO 8601 string, e.g. 2024-01-01T12:00:00.000000Z
+
+    Formats time.time_ns() directly, without building timezone-aware datetime
+    objects on hot paths (task creation, step recording, webhooks).
+    """
+    seconds, nanoseconds = divmod(time.time_ns(), 1_000_000_000)
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(seconds)) + f".{nanoseconds // 1000:06d}Z"
+
+
+# Sensitive data (X_* environment variables), collected once at import
+_SENSITIVE_DATA = {
+    key: value for key, value in os.environ.items() if key.startswith("X_") and value
+}
+
 
 def get_sensitive_data():
-    """Extract sensitive data from environment variables"""
-    sensitive_data = {}
-    for key, value in os.environ.items():
-        if key.startswith("X_") and value:
-            sensitive_data[key] = value
-    return sensitive_data
+    """Get sensitive data from environment variables
+
+    Returns a copy of the snapshot taken at startup, so agents can't modify it.
+    """
+    return dict(_SENSITIVE_DATA)
 
 
 def prepare_task_environment(task_id: str, _user_id: str):
@@ -55,7 +76,7 @@ async def trigger_webhook(
         "event": event_type,
         "task_id": task_id,
         "status": status,
-        "timestamp": datetime.now(UTC).isoformat() + "Z",
+        "timestamp": utc_now_iso(),
     }
     
     # Add result or error based on status
@@ -66,10 +87,7 @@ async def trigger_webhook(
     elif status == "failed" and error:
         payload["error"] = error
     
-    # Import httpx only when needed
-    try:
-        import httpx
-    except ImportError:
+    if httpx is None:
         logger.error("httpx is not installed. Cannot send webhook. Please install httpx: pip install httpx")
         return False
     
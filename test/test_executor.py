@@ -0,0 +1,77 @@
+"""
+任务调度单元测试 - 不需要启动服务, 也不需要 browser_use
+
+运行: python -m unittest test.test_executor
+"""
+
+import asyncio
+import sys
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from task import executor
+from task.constants import TaskStatus
+from task.storage.memory import InMemoryTaskStorage
+
+
+class ScheduleTaskTest(unittest.TestCase):
+
+    def setUp(self):
+        self.storage = InMemoryTaskStorage()
+        self.storage.create_task("q", {"id": "q", "status": TaskStatus.CREATED, "created_at": "2024-01-01"})
+
+    def run_queued(self, scenario):
+        """在没有空闲执行槽的情况下运行 scenario, execute_task 被替换为 mock"""
+        async def run():
+            with mock.patch.object(executor, "_task_semaphore", asyncio.Semaphore(0)), \
+                    mock.patch.object(executor, "execute_task", new=mock.AsyncMock()) as execute:
+                await scenario()
+                return execute
+
+        return asyncio.run(run())
+
+    def test_cancel_queued_task_frees_pending_place(self):
+        """取消排队中的任务后立即释放 pending 名额"""
+        async def scenario():
+            queued = executor.schedule_task("q", "x", "openai", task_storage=self.storage)
+            await asyncio.sleep(0)
+            self.assertTrue(executor.cancel_queued_task("q"))
+            await asyncio.gather(queued, return_exceptions=True)
+            await asyncio.sleep(0)  # let the done callbacks run
+            self.assertTrue(queued.cancelled())
+            self.assertNotIn(queued, executor._background_tasks)
+            self.assertFalse(executor.cancel_queued_task("q"))
+
+        execute = self.run_queued(scenario)
+        execute.assert_not_called()
+
+    def test_task_stopped_while_queued_is_not_started(self):
+        """排队期间被停止 (例如由其他 worker) 的任务拿到执行槽后不会再被改为 running"""
+        async def scenario():
+            queued = executor.schedule_task("q", "x", "openai", task_storage=self.storage)
+            await asyncio.sleep(0)
+            self.storage.update_task_if_status("q", TaskStatus.CREATED, {"status": TaskStatus.STOPPED})
+            executor._task_semaphore.release()
+            await queued
+
+        execute = self.run_queued(scenario)
+        execute.assert_not_called()
+        self.assertEqual(self.storage.get_task("q")["status"], TaskStatus.STOPPED)
+
+    def test_queued_task_is_claimed_as_running(self):
+        """拿到执行槽的任务以条件写入切换为 running 后再执行"""
+        async def scenario():
+            queued = executor.schedule_task("q", "x", "openai", task_storage=self.storage)
+            executor._task_semaphore.release()
+            await queued
+
+        execute = self.run_queued(scenario)
+        execute.assert_awaited_once()
+        self.assertEqual(self.storage.get_task("q")["status"], TaskStatus.RUNNING)
+
+
+if __name__ == "__main__":
+    unittest.main()
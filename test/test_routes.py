@@ -0,0 +1,160 @@
+"""
+API 路由单元测试 - 不需要启动服务, 也不需要 browser_use
+
+通过 FastAPI TestClient 直接调用应用, 任务数据写入内存存储,
+不会真正执行浏览器任务。
+
+运行: python -m unittest test.test_routes
+"""
+
+import json
+import sys
+import unittest
+import uuid
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi.testclient import TestClient
+
+from app.bootstrap import create_app
+from app.routes import task_storage
+from task.constants import TaskStatus
+
+
+class RoutesTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.client = TestClient(create_app())
+
+    def setUp(self):
+        # A fresh user per test keeps tasks from other tests out of the listings
+        self.user_id = f"user-{uuid.uuid4().hex[:8]}"
+        self.headers = {"X-User-Id": self.user_id}
+
+    def create_task(self, status: TaskStatus, agent=None, steps=None) -> str:
+        task_id = uuid.uuid4().hex
+        task_storage.create_task(task_id, {
+            "id": task_id,
+            "status": status,
+            "created_at": f"2024-01-01T00:00:00.{task_id}",
+            "steps": steps or [],
+            "agent": agent,
+        }, self.user_id)
+        return task_id
+
+    def read_events(self, task_id: str) -> list:
+        with self.client.stream(
+            "GET", f"/api/v1/task/{task_id}/events", params={"user_id": self.user_id}
+        ) as response:
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.headers["content-type"].split(";")[0], "text/event-stream")
+            body = response.read().decode()
+        return [json.loads(line[len("data: "):]) for line in body.splitlines() if line.startswith("data: ")]
+
+    # ---------- 步骤 ----------
+
+    def test_get_task_steps_next(self):
+        """steps 接口的 next 指向实际步骤数, since 超出范围时也不会越过末尾"""
+        task_id = self.create_task(TaskStatus.RUNNING, steps=[{"step": 1}, {"step": 2}])
+        for since, expected in ((0, {"steps": [{"step": 1}, {"step": 2}], "next": 2}),
+                                (1, {"steps": [{"step": 2}], "next": 2}),
+                                (10, {"steps": [], "next": 2})):
+            response = self.client.get(f"/api/v1/task/{task_id}/steps", params={"since": since}, headers=self.headers)
+            self.assertEqual(response.json(), expected, since)
+
+    # ---------- SSE ----------
+
+    def test_events_stream_sends_task_and_ends_when_finished(self):
+        """已结束的任务: 推送一次完整任务后关闭流"""
+        task_id = self.create_task(TaskStatus.FINISHED, steps=[{"step": 1}, {"step": 2}])
+        events = self.read_events(task_id)
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0]["status"], "finished")
+        self.assertEqual(events[0]["steps"], [{"step": 1}, {"step": 2}])
+        self.assertEqual(events[0]["steps_offset"], 0)
+        self.assertNotIn("agent", events[0])
+
+    def test_events_stream_unknown_task(self):
+        """不存在的任务返回 404"""
+        response = self.client.get("/api/v1/task/missing/events", headers=self.headers)
+        self.assertEqual(response.status_code, 404)
+
+    # ---------- 任务控制 ----------
+
+    def test_stop_with_local_agent(self):
+        """本进程持有 agent 时停止任务"""
+        agent = mock.Mock()
+        task_id = self.create_task(TaskStatus.RUNNING, agent=agent)
+        response = self.client.put(f"/api/v1/stop-task/{task_id}", headers=self.headers)
+        self.assertEqual(response.json(), {"message": "Task stopping"})
+        agent.stop.assert_called_once()
+        self.assertEqual(task_storage.get_task(task_id, self.user_id)["status"], TaskStatus.STOPPING)
+
+    def test_stop_queued_task(self):
+        """排队中的任务 (还没有 agent) 直接标记为 stopped"""
+        task_id = self.create_task(TaskStatus.CREATED)
+        response = self.client.put(f"/api/v1/stop-task/{task_id}", headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(task_storage.get_task(task_id, self.user_id)["status"], TaskStatus.STOPPED)
+
+    def test_control_without_local_agent_conflicts(self):
+        """运行中但 agent 不在本进程: 返回 409, 不改写任务状态"""
+        for path, status in (("stop-task", TaskStatus.RUNNING),
+                             ("pause-task", TaskStatus.RUNNING),
+                             ("resume-task", TaskStatus.PAUSED)):
+            task_id = self.create_task(status)
+            response = self.client.put(f"/api/v1/{path}/{task_id}", headers=self.headers)
+            self.assertEqual(response.status_code, 409, path)
+            self.assertEqual(task_storage.get_task(task_id, self.user_id)["status"], status)
+
+    def test_status_messages_use_plain_values(self):
+        """提示信息中的状态是纯字符串, 而不是 TaskStatus.XXX"""
+        task_id = self.create_task(TaskStatus.FINISHED)
+        response = self.client.put(f"/api/v1/pause-task/{task_id}", headers=self.headers)
+        self.assertEqual(response.json(), {"message": "Task status is finished, expected running"})
+        response = self.client.put(f"/api/v1/stop-task/{task_id}", headers=self.headers)
+        self.assertEqual(response.json(), {"message": "Task already in terminal state: finished"})
+
+    # ---------- 用户 ID ----------
+
+    def test_user_id_validation(self):
+        """用户 ID 允许邮箱等常见格式, 拒绝 ":"、空白和控制字符"""
+        for user_id in ("a+b@x.com", "team/alice", "O'Brien"):
+            response = self.client.get("/api/v1/list-tasks", headers={"X-User-Id": user_id})
+            self.assertEqual(response.status_code, 200, user_id)
+
+        response = self.client.get("/api/v1/list-tasks", headers={"X-User-Id": "a:b"})
+        self.assertEqual(response.status_code, 400)
+        # The query string fallback of the streaming endpoint is validated the same way
+        for user_id in ("a:b", "a b", "a\nb", "x" * 129):
+            response = self.client.get("/api/v1/task/missing/events", params={"user_id": user_id})
+            self.assertEqual(response.status_code, 400, user_id)
+
+    # ---------- 任务列表 ----------
+
+    def test_list_tasks_cursor_paging(self):
+        """list-tasks 按游标分页, 无效游标返回 400"""
+        created = [self.create_task(TaskStatus.FINISHED) for _ in range(3)]
+        expected = sorted(created, reverse=True)
+
+        seen, after = [], None
+        while True:
+            params = {"per_page": 2}
+            if after:
+                params["after"] = after
+            result = self.client.get("/api/v1/list-tasks", params=params, headers=self.headers).json()
+            seen += [t["id"] for t in result["tasks"]]
+            after = result["next"]
+            if after is None:
+                break
+        self.assertEqual(seen, expected)
+
+        response = self.client.get("/api/v1/list-tasks", params={"after": "missing"}, headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
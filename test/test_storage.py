@@ -0,0 +1,192 @@
+"""
+任务存储单元测试 - 不需要启动服务
+
+覆盖内存存储和 Redis 存储 (需要安装 fakeredis[lua], 否则跳过):
+游标分页、created_at 更新后的排序、watch_task 的推送与关闭。
+
+运行: python -m unittest test.test_storage
+"""
+
+import asyncio
+import sys
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from task.constants import TaskStatus
+from task.storage.memory import InMemoryTaskStorage
+
+try:
+    import fakeredis
+    import lupa  # noqa: F401  (fakeredis needs it to run the Lua scripts)
+except ImportError:
+    fakeredis = None
+
+
+def make_task(task_id: str, created_at: str, status: TaskStatus = TaskStatus.RUNNING) -> dict:
+    return {"id": task_id, "status": status, "created_at": created_at, "steps": []}
+
+
+class StorageTests:
+    """Tests shared by every TaskStorage backend; subclasses provide make_storage()"""
+
+    def make_storage(self):
+        raise NotImplementedError
+
+    def setUp(self):
+        self.storage = self.make_storage()
+        for i in range(5):
+            self.storage.create_task(f"t{i}", make_task(f"t{i}", f"2024-01-01T00:00:0{i}"))
+
+    def test_list_tasks_newest_first(self):
+        """按创建时间倒序列出任务"""
+        result = self.storage.list_tasks(per_page=2)
+        self.assertEqual([t["id"] for t in result["tasks"]], ["t4", "t3"])
+        self.assertEqual(result["total"], 5)
+        self.assertEqual(result["next"], "t3")
+
+    def test_cursor_paging_visits_every_task_once(self):
+        """游标分页: 逐页读取, 每个任务只出现一次, 最后一页 next 为 None"""
+        seen, after = [], None
+        while True:
+            result = self.storage.list_tasks(per_page=2, after=after)
+            seen += [t["id"] for t in result["tasks"]]
+            after = result["next"]
+            if after is None:
+                break
+        self.assertEqual(seen, ["t4", "t3", "t2", "t1", "t0"])
+
+    def test_cursor_is_stable_while_tasks_are_created(self):
+        """翻页期间创建的新任务不会让后续页面重复或跳过任务"""
+        first = self.storage.list_tasks(per_page=2)
+        self.storage.create_task("t5", make_task("t5", "2024-01-01T00:00:05"))
+        second = self.storage.list_tasks(per_page=2, after=first["next"])
+        self.assertEqual([t["id"] for t in second["tasks"]], ["t2", "t1"])
+
+    def test_unknown_cursor_raises_key_error(self):
+        """未知游标抛出 KeyError"""
+        with self.assertRaises(KeyError):
+            self.storage.list_tasks(after="missing")
+
+    def test_update_created_at_moves_task_in_listing(self):
+        """更新 created_at 后列表顺序随之变化"""
+        self.storage.update_task("t0", {"created_at": "2024-01-01T00:00:09"})
+        result = self.storage.list_tasks(per_page=10)
+        self.assertEqual([t["id"] for t in result["tasks"]], ["t0", "t4", "t3", "t2", "t1"])
+        self.assertEqual(result["total"], 5)
+
+    def test_update_task_if_status(self):
+        """条件更新: 只有状态匹配时才写入"""
+        self.storage.create_task("q", make_task("q", "2024-01-01T00:00:09", TaskStatus.CREATED))
+        self.assertTrue(self.storage.update_task_if_status("q", TaskStatus.CREATED, {"status": TaskStatus.RUNNING}))
+        self.assertFalse(self.storage.update_task_if_status("q", TaskStatus.CREATED, {"status": TaskStatus.STOPPED}))
+        self.assertEqual(self.storage.get_task("q")["status"], TaskStatus.RUNNING)
+        self.assertFalse(self.storage.update_task_if_status("missing", TaskStatus.CREATED, {"status": TaskStatus.RUNNING}))
+
+    def test_get_task_steps_since(self):
+        """get_task_steps 只返回 since 之后的步骤"""
+        for i in range(3):
+            self.storage.add_task_step("t0", {"step": i})
+        self.assertEqual(self.storage.get_task_steps("t0", since=1), ([{"step": 1}, {"step": 2}], 3))
+        self.assertIsNone(self.storage.get_task_steps("missing"))
+
+    def test_get_task_steps_since_past_end(self):
+        """since 超过步骤数时返回空列表和实际的步骤总数"""
+        for i in range(3):
+            self.storage.add_task_step("t0", {"step": i})
+        self.assertEqual(self.storage.get_task_steps("t0", since=10), ([], 3))
+
+    def test_watch_task_pushes_updates_until_terminal(self):
+        """watch_task 在任务变化时推送, 任务结束后停止"""
+        async def scenario():
+            seen = []
+
+            async def consume():
+                async for task in self.storage.watch_task("t0", timeout=5):
+                    if task is not None:
+                        seen.append((task["status"], len(task["steps"])))
+
+            consumer = asyncio.create_task(consume())
+            await asyncio.sleep(0.1)
+            await self.storage.call(self.storage.add_task_step, "t0", {"step": 1})
+            await asyncio.sleep(0.1)
+            await self.storage.call(self.storage.finalize_task, "t0", status=TaskStatus.FINISHED)
+            await asyncio.wait_for(consumer, 2)
+            return seen
+
+        seen = asyncio.run(scenario())
+        self.assertEqual(seen[0], (TaskStatus.RUNNING, 0))
+        self.assertIn((TaskStatus.RUNNING, 1), seen)
+        self.assertEqual(seen[-1], (TaskStatus.FINISHED, 1))
+
+    def test_close_watchers_ends_open_streams(self):
+        """close_watchers 立即结束正在等待的 watch_task"""
+        async def scenario():
+            async def consume():
+                async for _ in self.storage.watch_task("t0", timeout=30):
+                    pass
+
+            consumer = asyncio.create_task(consume())
+            await asyncio.sleep(0.1)
+            self.storage.close_watchers()
+            await asyncio.wait_for(consumer, 2)
+
+        asyncio.run(scenario())
+
+
+class InMemoryTaskStorageTest(StorageTests, unittest.TestCase):
+
+    def make_storage(self):
+        return InMemoryTaskStorage()
+
+    def test_disconnected_watcher_is_cleaned_up(self):
+        """客户端断开后不残留唤醒事件, 其他观察者仍能收到更新"""
+        async def scenario():
+            updates = []
+
+            async def consume(name):
+                async for task in self.storage.watch_task("t0", timeout=5):
+                    updates.append(name)
+
+            first = asyncio.create_task(consume("first"))
+            second = asyncio.create_task(consume("second"))
+            await asyncio.sleep(0.1)
+            first.cancel()
+            await asyncio.sleep(0.1)
+            updates.clear()
+            self.storage.add_task_step("t0", {"step": 1})
+            await asyncio.sleep(0.1)
+            self.assertEqual(updates, ["second"])
+
+            second.cancel()
+            await asyncio.sleep(0.1)
+
+        asyncio.run(scenario())
+        self.assertEqual(self.storage._update_events, {})
+        self.assertEqual(self.storage._watcher_counts, {})
+
+
+@unittest.skipIf(fakeredis is None, "fakeredis[lua] is not installed")
+class RedisTaskStorageTest(StorageTests, unittest.TestCase):
+
+    def make_storage(self):
+        from task.storage import redis_storage
+
+        server = fakeredis.FakeServer()
+        sync_client = fakeredis.FakeRedis(server=server, decode_responses=True)
+        async_client = fakeredis.FakeAsyncRedis(server=server, decode_responses=True)
+        with mock.patch.object(redis_storage.redis.Redis, "from_url", return_value=sync_client):
+            storage = redis_storage.RedisTaskStorage()
+        # Created lazily by watch_task; hand it the fake instead
+        storage._async_redis = async_client
+        return storage
+
+    def test_is_blocking(self):
+        """Redis 存储标记为阻塞, call() 会放到线程池执行"""
+        self.assertTrue(self.storage.blocking)
+
+
+if __name__ == "__main__":
+    unittest.main()